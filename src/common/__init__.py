@@ -0,0 +1,5 @@
+"""Components shared by the customer retention services.
+
+The package lives next to the services under ``src/`` and is copied into each
+service image as ``/app/common`` (see the service Dockerfiles).
+"""
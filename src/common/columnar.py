@@ -0,0 +1,204 @@
+import os
+import shutil
+import logging
+import pandas as pd
+
+from common.db import read_table, table_columns
+from common.schema import apply_schema
+from common.sqlite_writer import quote_identifier
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is an optional dependency
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMN = "date"
+
+
+def columnar_available() -> bool:
+    """Return True when pyarrow is installed."""
+    return pa is not None
+
+
+def write_partitioned(frame: pd.DataFrame, root: str) -> None:
+    """Append ``frame`` to the Parquet dataset at ``root``, partitioned by date.
+
+    Every call adds new files under ``root/date=YYYY-MM-DD/``; existing files
+    are left untouched, so the dataset grows like the SQL table it mirrors.
+    """
+    if not columnar_available():
+        logger.warning("pyarrow is not installed; skipping columnar write")
+        return
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        root_path=root,
+        partition_cols=[PARTITION_COLUMN],
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def rewrite_partitioned(frame: pd.DataFrame, root: str) -> None:
+    """Replace the dataset at ``root`` with ``frame``.
+
+    Used when the mirrored table is updated in place (upserts) rather than
+    appended to. The new dataset is written next to the old one and swapped
+    in with renames, so readers never see a half-written store.
+    """
+    if not columnar_available():
+        logger.warning("pyarrow is not installed; skipping columnar write")
+        return
+    root = root.rstrip(os.sep)
+    staging, retired = f"{root}.staging", f"{root}.old"
+    for path in (staging, retired):
+        shutil.rmtree(path, ignore_errors=True)
+    write_partitioned(frame, staging)
+    if os.path.exists(root):
+        os.replace(root, retired)
+    if os.path.exists(staging):
+        os.replace(staging, root)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def partition_dir(root: str, value) -> str:
+    return os.path.join(root, f"{PARTITION_COLUMN}={value}")
+
+
+def rewrite_partitions(frame: pd.DataFrame, root: str, values) -> None:
+    """Replace the date partitions ``values`` of the dataset at ``root``.
+
+    ``frame`` holds the current rows of those partitions; a partition with
+    no rows left is removed. Other partitions are not touched, so an upsert
+    costs the size of the dates it changed rather than of the whole store.
+    Each partition is written next to the old one and swapped in by rename.
+    """
+    if not columnar_available():
+        logger.warning("pyarrow is not installed; skipping columnar write")
+        return
+    root = root.rstrip(os.sep)
+    staging, retired = f"{root}.staging", f"{root}.old"
+    for path in (staging, retired):
+        shutil.rmtree(path, ignore_errors=True)
+    if not frame.empty:
+        write_partitioned(frame, staging)
+    os.makedirs(retired)
+    os.makedirs(root, exist_ok=True)
+    for value in sorted(set(map(str, values))):
+        if os.path.exists(partition_dir(root, value)):
+            os.replace(partition_dir(root, value), partition_dir(retired, value))
+        if os.path.exists(partition_dir(staging, value)):
+            os.replace(partition_dir(staging, value), partition_dir(root, value))
+    for path in (staging, retired):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def partitions_of_keys(
+    db_engine, tablename: str, frame: pd.DataFrame, key_columns: list
+) -> set:
+    """Date partitions of the rows of ``tablename`` sharing a key with ``frame``.
+
+    These are the partitions an upsert of ``frame`` removes rows from; the
+    unique index on the key keeps the lookup to the matching rows.
+    """
+    if PARTITION_COLUMN not in table_columns(db_engine, tablename):
+        return set()
+    unique = frame[key_columns].drop_duplicates().astype(object)
+    keys = list(unique.itertuples(index=False, name=None))
+    row = f"({', '.join('?' for _ in key_columns)})"
+    key_expr = f"({', '.join(quote_identifier(col) for col in key_columns)})"
+    values, step = set(), max(1, 500 // len(key_columns))
+    for start in range(0, len(keys), step):
+        chunk = keys[start : start + step]
+        query = (
+            f"SELECT DISTINCT {quote_identifier(PARTITION_COLUMN)} "
+            f"FROM {quote_identifier(tablename)} WHERE {key_expr} IN "
+            f"(VALUES {', '.join(row for _ in chunk)})"
+        )
+        params = [value for key in chunk for value in key]
+        values.update(value for (value,) in db_engine.execute(query, params))
+    return values
+
+
+def _dataset(root: str):
+    partitioning = ds.partitioning(
+        pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive"
+    )
+    return ds.dataset(root, format="parquet", partitioning=partitioning)
+
+
+def read_partitioned(
+    root: str, columns: list = None, start_date: str = None, end_date: str = None
+) -> pd.DataFrame:
+    """Read the dataset at ``root``, loading only the requested columns.
+
+    ``start_date`` and ``end_date`` (inclusive, ``YYYY-MM-DD``) prune whole
+    date partitions before any file is opened.
+    """
+    condition = None
+    if start_date:
+        condition = ds.field(PARTITION_COLUMN) >= str(start_date)
+    if end_date:
+        upper = ds.field(PARTITION_COLUMN) <= str(end_date)
+        condition = upper if condition is None else condition & upper
+    table = _dataset(root).to_table(columns=columns, filter=condition)
+    return table.to_pandas()
+
+
+def read_sql_projection(
+    db_engine,
+    tablename: str,
+    columns: list = None,
+    start_date: str = None,
+    end_date: str = None,
+    dtypes: dict = None,
+) -> pd.DataFrame:
+    """Read the requested columns and date range of ``tablename`` with SQL."""
+    clauses, params = [], []
+    if start_date:
+        clauses.append(f"{PARTITION_COLUMN} >= ?")
+        params.append(str(start_date))
+    if end_date:
+        clauses.append(f"{PARTITION_COLUMN} <= ?")
+        params.append(str(end_date))
+    return read_table(
+        db_engine,
+        tablename,
+        columns=columns,
+        where=" AND ".join(clauses) or None,
+        params=params,
+        dtypes=dtypes,
+    )
+
+
+def load_processed_data(
+    db_engine,
+    tablename: str,
+    columns: list = None,
+    start_date: str = None,
+    end_date: str = None,
+    columnar_path: str = None,
+    dtypes: dict = None,
+) -> pd.DataFrame:
+    """Load processed data from the Parquet store, falling back to SQL.
+
+    The Parquet dataset is used when ``columnar_path`` is configured, pyarrow
+    is installed and the dataset exists; otherwise the same projection and
+    date filter are pushed down into a SQL query on ``tablename``. Either way
+    the result is cast to ``dtypes`` (typically the table's stored schema).
+    """
+    if columnar_path and columnar_available():
+        try:
+            frame = read_partitioned(columnar_path, columns, start_date, end_date)
+            return apply_schema(frame, dtypes) if dtypes else frame
+        except (FileNotFoundError, OSError) as e:
+            logger.warning(
+                f"Columnar store at {columnar_path} unavailable ({str(e)}); "
+                f"reading {tablename} from the database"
+            )
+    return read_sql_projection(
+        db_engine, tablename, columns, start_date, end_date, dtypes=dtypes
+    )
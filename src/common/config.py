@@ -0,0 +1,43 @@
+import os
+import copy
+import logging
+import threading
+import yaml
+
+logger = logging.getLogger(__name__)
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_yaml_config(config_path: str, validator=None) -> dict:
+    """Load a YAML config file, parsing and validating it only when it changes.
+
+    The parsed config is cached per path (and validator) together with the
+    file's modification time. Later calls cost one ``stat``; the file is
+    re-read and re-validated only when its mtime changes, so edits are picked
+    up without a restart. Each caller gets its own copy of the config.
+    """
+    mtime = os.stat(config_path).st_mtime_ns
+    key = (os.path.abspath(config_path), validator)
+
+    with _lock:
+        cached = _cache.get(key)
+    if cached is None or cached[0] != mtime:
+        with open(config_path) as config_file:
+            config = yaml.safe_load(config_file)
+        if validator is not None:
+            validator(config)
+        if cached is not None:
+            logger.info(f"Reloaded configuration from {config_path}")
+        cached = (mtime, config)
+        with _lock:
+            _cache[key] = cached
+
+    return copy.deepcopy(cached[1])
+
+
+def clear_config_cache() -> None:
+    """Forget all cached configs so the next load re-reads the files."""
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,201 @@
+import queue
+import logging
+import sqlite3
+import threading
+import pandas as pd
+
+from common.schema import apply_schema
+from common.sqlite_writer import configure_connection, quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# Connections checked out by the current thread, by database path
+_local = threading.local()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Most connections a process keeps open per database
+POOL_SIZE = 8
+
+
+def connect_sqlite(dbpath: str) -> sqlite3.Connection:
+    """Create and return a new, configured SQLite connection."""
+    try:
+        return configure_connection(sqlite3.connect(dbpath, check_same_thread=False))
+    except Exception as e:
+        logger.error(f"Error connecting to SQLite database {dbpath}: {str(e)}")
+        raise
+
+
+class ConnectionPool:
+    """A bounded set of connections to one database, shared by all threads.
+
+    Connections are opened lazily, up to ``size``, and handed out by
+    :meth:`acquire`; :meth:`release` puts one back for the next request or
+    job, with its pragmas applied and statement cache warm. When all are in
+    use ``acquire`` waits up to ``timeout`` seconds for one to come back.
+    """
+
+    def __init__(self, dbpath: str, size: int = POOL_SIZE, timeout: float = 30):
+        self.dbpath = dbpath
+        self.size = size
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self.opened < self.size:
+                self.opened += 1
+                opening = True
+            else:
+                opening = False
+        if opening:
+            try:
+                return connect_sqlite(self.dbpath)
+            except Exception:
+                with self._lock:
+                    self.opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No free connection to {self.dbpath} after {self.timeout}s"
+            ) from None
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close the idle connections (checked-out ones stay open)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self.opened -= 1
+
+
+def get_pool(dbpath: str) -> ConnectionPool:
+    """The process-wide connection pool for ``dbpath``."""
+    with _pools_lock:
+        pool = _pools.get(dbpath)
+        if pool is None:
+            pool = _pools[dbpath] = ConnectionPool(dbpath)
+        return pool
+
+
+def get_connection(dbpath: str) -> sqlite3.Connection:
+    """Return the connection the calling thread has checked out for ``dbpath``.
+
+    The first call in a request or job checks one out of the process-wide
+    :class:`ConnectionPool`; later calls in the same thread get the same
+    one until :func:`release_connections` returns it at the end of the
+    request or job. Threads of the threaded dev server come and go with the
+    requests, so connections belong to the pool rather than to threads.
+    """
+    held = getattr(_local, "connections", None)
+    if held is None:
+        held = _local.connections = {}
+    conn = held.get(dbpath)
+    if conn is None:
+        conn = held[dbpath] = get_pool(dbpath).acquire()
+    return conn
+
+
+def release_connections(*args) -> None:
+    """Return the calling thread's connections to their pools.
+
+    Takes and ignores any arguments, so it can be registered directly as a
+    Flask ``teardown_appcontext`` handler.
+    """
+    for dbpath, conn in getattr(_local, "connections", {}).items():
+        get_pool(dbpath).release(conn)
+    _local.connections = {}
+
+
+def close_connections() -> None:
+    """Release the calling thread's connections and close every idle one."""
+    release_connections()
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+def table_columns(db_engine, tablename: str) -> list:
+    """Return the column names of ``tablename`` (empty if it does not exist)."""
+    rows = db_engine.execute(
+        f"PRAGMA table_info({quote_identifier(tablename)})"
+    ).fetchall()
+    return [row[1] for row in rows]
+
+
+def build_select(
+    tablename: str,
+    columns: list = None,
+    where: str = None,
+    order_by: str = None,
+    limit: int = None,
+) -> str:
+    """Build a SELECT statement; ``where`` should use ``?`` placeholders."""
+    projection = ", ".join(quote_identifier(col) for col in columns) if columns else "*"
+    query = f"SELECT {projection} FROM {quote_identifier(tablename)}"
+    if where:
+        query += f" WHERE {where}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    return query
+
+
+def read_sql(db_engine, query: str, params=None, dtypes: dict = None) -> pd.DataFrame:
+    """Run a query into a DataFrame, casting columns to ``dtypes`` if given.
+
+    ``dtypes`` may name columns the query does not return (e.g. a full table
+    schema with a narrower projection); those entries are ignored.
+    """
+    frame = pd.read_sql(query, db_engine, params=params)
+    return apply_schema(frame, dtypes) if dtypes else frame
+
+
+def read_table(
+    db_engine,
+    tablename: str,
+    columns: list = None,
+    where: str = None,
+    params=None,
+    order_by: str = None,
+    limit: int = None,
+    dtypes: dict = None,
+) -> pd.DataFrame:
+    """Read (part of) a table with the projection and filter done in SQL."""
+    query = build_select(tablename, columns, where, order_by, limit)
+    return read_sql(db_engine, query, params=params, dtypes=dtypes)
+
+
+def iter_table(
+    db_engine,
+    tablename: str,
+    columns: list = None,
+    where: str = None,
+    params=None,
+    chunksize: int = 50000,
+    dtypes: dict = None,
+):
+    """Yield a table as DataFrames of at most ``chunksize`` rows."""
+    query = build_select(tablename, columns, where, order_by="rowid")
+    for chunk in pd.read_sql(query, db_engine, params=params, chunksize=chunksize):
+        yield apply_schema(chunk, dtypes) if dtypes else chunk
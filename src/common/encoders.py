@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+def as_frame(X) -> pd.DataFrame:
+    """Return ``X`` as a DataFrame; lists of record dicts are converted."""
+    return X if isinstance(X, pd.DataFrame) else pd.DataFrame.from_records(X)
+
+
+class FrameEncoder(BaseEstimator, TransformerMixin):
+    """One-hot encode text/categorical columns and pass numeric columns through.
+
+    A column-wise replacement for ``DictVectorizer`` on DataFrames: it never
+    builds per-row dicts, and produces the same features (``col=value``
+    indicators and numeric ``col``, in sorted order). Unseen categories and
+    missing columns encode as zeros, and missing numbers as 0, as with a
+    dict that lacks the key. Output is a dense C-contiguous ``float32``
+    matrix.
+    """
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        frame = as_frame(X)
+        self.numeric_columns_ = []
+        self.categories_ = {}
+        for col, series in frame.items():
+            if series.dtype.kind in "biuf":
+                self.numeric_columns_.append(col)
+            else:
+                values = series.dropna().unique()
+                self.categories_[col] = sorted(str(value) for value in values)
+
+        names = list(self.numeric_columns_) + [
+            f"{col}={value}"
+            for col, values in self.categories_.items()
+            for value in values
+        ]
+        order = np.argsort(names, kind="stable")
+        self.feature_names_ = [names[i] for i in order]
+        # Output position of every unsorted feature
+        self.positions_ = np.empty(len(names), dtype=np.intp)
+        self.positions_[order] = np.arange(len(names))
+        return self
+
+    def transform(self, X):
+        frame = as_frame(X)
+        out = np.zeros((len(frame), len(self.feature_names_)), dtype=self.dtype)
+        offset = 0
+        for col in self.numeric_columns_:
+            if col in frame.columns:
+                values = pd.to_numeric(frame[col], errors="coerce").fillna(0)
+                out[:, self.positions_[offset]] = values.to_numpy()
+            offset += 1
+        for col, values in self.categories_.items():
+            if col in frame.columns:
+                series = frame[col]
+                labels = series.astype(str).where(series.notna())
+                codes = pd.Categorical(labels, categories=values).codes
+                rows = np.flatnonzero(codes >= 0)
+                out[rows, self.positions_[offset + codes[rows]]] = 1
+            offset += len(values)
+        return out
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_, dtype=object)
+
+
+def encoder_input(model, frame: pd.DataFrame):
+    """Return ``frame`` in the form ``model`` was trained on.
+
+    Pipelines that start with a :class:`FrameEncoder` take the DataFrame as
+    it is; older ``DictVectorizer`` pipelines get a list of record dicts.
+    """
+    if not isinstance(frame, pd.DataFrame):
+        return frame
+    steps = getattr(model, "steps", None)
+    first = steps[0][1] if isinstance(steps, list) and steps else None
+    if isinstance(first, FrameEncoder):
+        return frame
+    return frame.to_dict(orient="records")
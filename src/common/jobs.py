@@ -0,0 +1,181 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from common.db import release_connections
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function once cancellation has been requested."""
+
+
+class Job:
+    """State and progress of one background job."""
+
+    def __init__(self, kind: str, key: str = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    def update(self, **progress):
+        """Record progress counters, e.g. ``job.update(rows_processed=5000)``."""
+        with self._lock:
+            self.progress.update(progress)
+
+    def advance(self, steps: int = 1):
+        """Count ``steps`` more completed units of work toward ``total``.
+
+        Also the point where a running job notices cancellation: raises
+        :class:`JobCancelled` once :meth:`cancel` has been called.
+        """
+        with self._lock:
+            self.progress["completed"] = self.progress.get("completed", 0) + steps
+        self.check_cancelled()
+
+    def cancel(self):
+        """Ask the job to stop; it does so at its next :meth:`advance`."""
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def eta_seconds(self):
+        """Remaining time extrapolated from the ``completed``/``total`` counters."""
+        completed = self.progress.get("completed")
+        total = self.progress.get("total")
+        if self.status != RUNNING or not completed or not total:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed / completed * max(total - completed, 0), 1)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "cancel_requested": self.cancel_requested,
+                "progress": dict(self.progress),
+                "eta_seconds": self.eta_seconds(),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "elapsed_seconds": (
+                    round(end - self.started_at, 3) if self.started_at else None
+                ),
+            }
+
+
+class JobManager:
+    """Run jobs on a bounded worker pool and keep their status for polling.
+
+    ``submit`` returns immediately; the job function is called on a worker
+    thread with the :class:`Job` as its first argument so it can report
+    progress. The most recent ``max_history`` jobs are kept in memory.
+
+    Jobs submitted with a ``key`` are deduplicated: while one with the same
+    key is queued or running, submitting again returns that job instead of
+    starting another.
+    """
+
+    def __init__(self, max_workers: int = 2, max_history: int = 1000):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_history = max_history
+
+    def submit(self, kind: str, func, *args, key: str = None, **kwargs) -> Job:
+        return self.submit_unique(kind, func, *args, key=key, **kwargs)[0]
+
+    def submit_unique(self, kind: str, func, *args, key: str = None, **kwargs):
+        """Like :meth:`submit`, returning ``(job, created)``.
+
+        ``created`` is False when an active job with the same ``key`` was
+        returned instead of a new one.
+        """
+        with self._lock:
+            active = self._active(key)
+            if active is not None:
+                return active, False
+            job = Job(kind, key=key)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_history:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job, True
+
+    def _active(self, key):
+        if key is None:
+            return None
+        for job in reversed(self._jobs.values()):
+            if job.key == key and job.status not in FINISHED:
+                return job
+        return None
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        """Request cancellation of a job; returns it, or None if unknown.
+
+        A queued job is dropped before it starts, a running one stops at its
+        next progress step. Finished jobs are left as they are.
+        """
+        job = self.get(job_id)
+        if job is not None and job.status not in FINISHED:
+            job.cancel()
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        job.started_at = time.time()
+        try:
+            job.check_cancelled()
+            job.status = RUNNING
+            job.result = func(job, *args, **kwargs)
+            job.status = SUCCEEDED
+        except JobCancelled:
+            logger.info(f"Job {job.id} ({job.kind}) cancelled")
+            job.status = CANCELLED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error, job.status = str(e), FAILED
+        finally:
+            # The worker thread outlives the job; hand its connections back
+            release_connections()
+            job.finished_at = time.time()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
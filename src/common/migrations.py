@@ -0,0 +1,99 @@
+import logging
+
+from common.db import table_columns
+from common.schema import ensure_schema_table
+from common.sqlite_writer import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# Columns the services filter, sort or join on. Every table that has one of
+# these columns gets a single-column index on it.
+INDEXED_COLUMNS = ("date", "customerid", "model", "model_name", "prediction_date")
+
+
+def index_name(tablename: str, column: str) -> str:
+    return f"idx_{tablename}_{column}".lower()
+
+
+def list_tables(conn) -> list:
+    """Return the names of the user tables in the database."""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def leading_columns(conn, tablename: str, exclude: str = None) -> dict:
+    """Map the first column of each index on ``tablename`` to the index name."""
+    leading = {}
+    table = quote_identifier(tablename)
+    for row in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        name = row[1]
+        if name == exclude:
+            continue
+        info = conn.execute(f"PRAGMA index_info({quote_identifier(name)})").fetchall()
+        if info:
+            leading.setdefault(min(info)[2], name)
+    return leading
+
+
+def ensure_indexes(conn, tables: list = None) -> list:
+    """Create any missing indexes on the hot columns of ``tables``.
+
+    Defaults to every table in the database. Indexes are created with
+    ``IF NOT EXISTS``, so this is cheap to run on every service start and
+    after a table is first written. A column that already leads another
+    index (e.g. the unique key of an upsert table) gets none, and a
+    single-column index made redundant that way is dropped. Returns the
+    names of the indexes checked.
+    """
+    names = []
+    for tablename in tables or list_tables(conn):
+        for column in table_columns(conn, tablename):
+            if column.lower() not in INDEXED_COLUMNS:
+                continue
+            name = index_name(tablename, column)
+            if column in leading_columns(conn, tablename, exclude=name):
+                conn.execute(f"DROP INDEX IF EXISTS {quote_identifier(name)}")
+                continue
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote_identifier(name)} "
+                f"ON {quote_identifier(tablename)} ({quote_identifier(column)})"
+            )
+            names.append(name)
+    if names:
+        # Refresh planner statistics for the tables that need it
+        conn.execute("PRAGMA optimize")
+    conn.commit()
+    return names
+
+
+def migrate(conn) -> None:
+    """Bring the database up to date at service start; never fails startup."""
+    try:
+        ensure_schema_table(conn)
+        created = ensure_indexes(conn)
+        logger.info(f"Database indexes in place: {', '.join(created) or 'none'}")
+    except Exception as e:
+        logger.warning(f"Could not ensure database indexes: {str(e)}")
+
+
+def explain_query_plan(conn, query: str, params=()) -> list:
+    """Return the detail lines of SQLite's plan for ``query``."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(conn, query: str, params=()) -> list:
+    """Return the plan steps of ``query`` that scan a table or sort in memory.
+
+    An empty list means every table access goes through an index, either as
+    a ``SEARCH`` or as an ordered index ``SCAN`` that a ``LIMIT`` can stop.
+    """
+    return [
+        detail
+        for detail in explain_query_plan(conn, query, params)
+        if (detail.startswith("SCAN") and "USING" not in detail)
+        or "TEMP B-TREE" in detail
+    ]
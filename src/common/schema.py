@@ -0,0 +1,174 @@
+import json
+import logging
+import pandas as pd
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_TABLE = "table_schemas"
+
+# Object columns with at most this many distinct values become categoricals
+MAX_CATEGORIES = 64
+
+# Text columns are only made categorical from samples of at least this many
+# rows; in smaller ones ids and dates look low-cardinality
+MIN_CATEGORY_ROWS = 1000
+
+# Identifier and date columns are never made categorical: their values are
+# mostly unique across the table even when a batch repeats a few of them
+NON_CATEGORY_COLUMNS = ("customerid", "date")
+
+# Numeric dtypes from narrowest to widest; a stored dtype only moves right
+WIDENING = ("int8", "int16", "int32", "int64", "float32", "float64")
+
+
+def infer_schema(
+    frame: pd.DataFrame,
+    max_categories: int = MAX_CATEGORIES,
+    min_category_rows: int = MIN_CATEGORY_ROWS,
+    exclude=NON_CATEGORY_COLUMNS,
+) -> dict:
+    """Infer compact dtypes for the columns of ``frame``.
+
+    Low-cardinality text becomes ``category`` (only when ``frame`` has at
+    least ``min_category_rows`` rows and the column is not in ``exclude``),
+    0/1 integer flags ``int8``, other integers the smallest signed type that
+    holds their range, integers with nulls ``float64`` and other floats
+    ``float32``. High-cardinality text (e.g. ids) is left out.
+    """
+    schema = {}
+    for col, series in frame.items():
+        if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+            if (
+                col not in exclude
+                and len(series) >= min_category_rows
+                and series.nunique(dropna=True) <= max_categories
+            ):
+                schema[col] = "category"
+        elif series.dtype.kind in "iub":
+            if series.isin([0, 1]).all():
+                schema[col] = "int8"
+            else:
+                schema[col] = pd.to_numeric(series, downcast="integer").dtype.name
+        elif series.dtype.kind == "f":
+            values = series.dropna()
+            if len(values) and (values == values.round()).all():
+                # Integers that picked up nulls; float32 would round them
+                schema[col] = "float64"
+            else:
+                schema[col] = "float32"
+    return schema
+
+
+def widen_schema(
+    stored: dict,
+    frame: pd.DataFrame,
+    max_categories: int = MAX_CATEGORIES,
+    exclude=NON_CATEGORY_COLUMNS,
+) -> dict:
+    """Return ``stored`` widened so that every value in ``frame`` fits it.
+
+    Integer columns move to a wider type when the batch is out of range (or
+    to ``float64`` when it has nulls), categoricals whose batch alone has
+    more than ``max_categories`` values, or that are in ``exclude``, go back
+    to plain text, and columns not stored yet are inferred from the batch.
+    """
+    observed = infer_schema(frame, max_categories, exclude=exclude)
+    schema = dict(stored)
+    for col, series in frame.items():
+        dtype = stored.get(col)
+        if dtype is None:
+            if col in observed:
+                schema[col] = observed[col]
+        elif dtype == "category":
+            if col in exclude or series.nunique(dropna=True) > max_categories:
+                del schema[col]
+        elif dtype in WIDENING and observed.get(col) in WIDENING:
+            seen = observed[col]
+            if dtype[0] != seen[0]:
+                # Integers meeting floats, in either order; float32 only holds
+                # integers up to 2**24 exactly, so keep them in float64
+                schema[col] = "float64"
+            else:
+                schema[col] = max(dtype, seen, key=WIDENING.index)
+    return schema
+
+
+def apply_schema(
+    frame: pd.DataFrame, schema: dict, narrow_floats: bool = True
+) -> pd.DataFrame:
+    """Cast the columns of ``frame`` named in ``schema`` to their dtypes.
+
+    Columns missing from the frame are ignored. With ``narrow_floats=False``
+    float columns keep their precision, which is what writers want: values
+    are stored at full precision and narrowed by the readers.
+    """
+    dtypes = {
+        col: dtype
+        for col, dtype in schema.items()
+        if col in frame.columns
+        and frame[col].dtype != dtype
+        and (narrow_floats or not str(dtype).startswith("float"))
+    }
+    if not dtypes:
+        return frame
+    return frame.astype(dtypes)
+
+
+def ensure_schema_table(conn) -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} "
+        "(tablename TEXT PRIMARY KEY, schema TEXT NOT NULL, updated_at TEXT)"
+    )
+
+
+def load_schema(conn, tablename: str) -> dict:
+    """Return the stored schema of ``tablename`` (empty if none was stored)."""
+    try:
+        row = conn.execute(
+            f"SELECT schema FROM {SCHEMA_TABLE} WHERE tablename = ?", (tablename,)
+        ).fetchone()
+    except Exception as e:
+        logger.warning(f"Could not load schema for {tablename}: {str(e)}")
+        return {}
+    return json.loads(row[0]) if row else {}
+
+
+def save_schema(conn, tablename: str, schema: dict) -> None:
+    ensure_schema_table(conn)
+    conn.execute(
+        f"INSERT INTO {SCHEMA_TABLE} (tablename, schema, updated_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(tablename) DO UPDATE SET "
+        "schema = excluded.schema, updated_at = excluded.updated_at",
+        (tablename, json.dumps(schema), datetime.now().isoformat(timespec="seconds")),
+    )
+    conn.commit()
+
+
+def resolve_schema(
+    conn,
+    tablename: str,
+    declared: dict = None,
+    sample: pd.DataFrame = None,
+    exclude=NON_CATEGORY_COLUMNS,
+) -> dict:
+    """Return the schema of ``tablename``, widened to fit ``sample``.
+
+    The stored schema is inferred from the first ``sample`` and widened by
+    every later one (see ``widen_schema``), so casting a batch to it never
+    wraps values. Declared dtypes (from config) always take precedence and
+    are saved along with the inferred ones. Columns in ``exclude`` (ids,
+    dates, upsert keys) are never made categorical.
+    """
+    declared = dict(declared or {})
+    ensure_schema_table(conn)
+    stored = load_schema(conn, tablename)
+    if sample is not None:
+        schema = {**widen_schema(stored, sample, exclude=exclude), **declared}
+    elif stored:
+        schema = {**stored, **declared}
+    else:
+        return declared
+    if schema != stored:
+        save_schema(conn, tablename, schema)
+    return schema
@@ -0,0 +1,191 @@
+import time
+import logging
+import sqlite3
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Several containers write to the same customer.db, so the database runs in
+# WAL mode (readers never block the writer) and writers wait on a busy lock
+# instead of failing immediately with "database is locked".
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative values are KiB, i.e. 64 MiB
+    "mmap_size": 268435456,  # 256 MiB
+    "busy_timeout": 30000,  # milliseconds
+    "temp_store": "MEMORY",
+}
+
+SQLITE_TYPES = {"i": "INTEGER", "u": "INTEGER", "b": "INTEGER", "f": "REAL", "M": "TIMESTAMP"}
+
+
+def configure_connection(conn: sqlite3.Connection, pragmas: dict = None):
+    """Apply the write-tuning pragmas to a SQLite connection and return it."""
+    for name, value in (pragmas or DEFAULT_PRAGMAS).items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for use in a SQL statement."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def create_table_for(conn: sqlite3.Connection, tablename: str, frame: pd.DataFrame):
+    """Create ``tablename`` with columns typed after ``frame`` if it is missing."""
+    columns = ", ".join(
+        f"{quote_identifier(col)} {SQLITE_TYPES.get(dtype.kind, 'TEXT')}"
+        for col, dtype in frame.dtypes.items()
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {quote_identifier(tablename)} ({columns})")
+
+
+def _frame_rows(frame: pd.DataFrame):
+    """Yield the rows of ``frame`` as tuples of values sqlite3 can bind."""
+    missing = frame.isna()
+    timestamps = {
+        col: frame[col].astype(str)
+        for col, dtype in frame.dtypes.items()
+        if dtype.kind == "M"
+    }
+    frame = frame.assign(**timestamps).astype(object).mask(missing, None)
+    return frame.itertuples(index=False, name=None)
+
+
+def _unique_index(conn: sqlite3.Connection, tablename: str, key_columns: list):
+    """Name of the unique key index of ``tablename`` and whether it exists."""
+    index = f"uq_{tablename}_{'_'.join(key_columns)}".lower()
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index,)
+    ).fetchone()
+    return index, exists is not None
+
+
+def _superseded_rows(tablename: str, key_columns: list) -> str:
+    """WHERE clause matching every row but the latest one of each key."""
+    table = quote_identifier(tablename)
+    keys = ", ".join(quote_identifier(col) for col in key_columns)
+    return f"rowid NOT IN (SELECT max(rowid) FROM {table} GROUP BY {keys})"
+
+
+def collapse_duplicate_keys(
+    conn: sqlite3.Connection, tablename: str, key_columns: list
+) -> int:
+    """Delete all but the most recently inserted row of each key.
+
+    A one-off migration for turning an append-only table (one snapshot per
+    run) into an upsert table; the older snapshots are gone for good.
+    Does nothing once the table has its unique key (or does not exist).
+    Returns the number of rows deleted.
+    """
+    _, exists = _unique_index(conn, tablename, key_columns)
+    if exists or not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tablename,)
+    ).fetchone():
+        return 0
+    table = quote_identifier(tablename)
+    cursor = conn.execute(
+        f"DELETE FROM {table} WHERE {_superseded_rows(tablename, key_columns)}"
+    )
+    conn.commit()
+    logger.warning(
+        f"Collapsed {cursor.rowcount} older rows of {tablename} "
+        f"to one row per {', '.join(key_columns)}"
+    )
+    return cursor.rowcount
+
+
+def ensure_unique_key(conn: sqlite3.Connection, tablename: str, key_columns: list):
+    """Make ``key_columns`` a unique key of ``tablename``.
+
+    Refuses, with a ``ValueError``, when rows are already duplicated on the
+    key (e.g. from earlier append-only runs): dropping them loses history,
+    so it is left to an explicit :func:`collapse_duplicate_keys` migration.
+    """
+    table = quote_identifier(tablename)
+    keys = ", ".join(quote_identifier(col) for col in key_columns)
+    index, exists = _unique_index(conn, tablename, key_columns)
+    if exists:
+        return
+    duplicates = conn.execute(
+        f"SELECT COUNT(*) FROM {table} WHERE {_superseded_rows(tablename, key_columns)}"
+    ).fetchone()[0]
+    if duplicates:
+        logger.error(
+            f"{tablename} has {duplicates} rows that an upsert on "
+            f"{', '.join(key_columns)} would remove"
+        )
+        raise ValueError(
+            f"{tablename} holds {duplicates} rows with a duplicated "
+            f"{', '.join(key_columns)}; collapse them explicitly before upserting"
+        )
+    conn.execute(f"CREATE UNIQUE INDEX {quote_identifier(index)} ON {table} ({keys})")
+
+
+def upsert_clause(frame: pd.DataFrame, key_columns: list, tablename: str) -> str:
+    """Return the ``ON CONFLICT`` clause replacing a row with the same key.
+
+    The replaced row also moves to a new, highest rowid, so readers that
+    track a table by rowid watermark see updated rows as well as new ones.
+    """
+    keys = ", ".join(quote_identifier(col) for col in key_columns)
+    updates = ", ".join(
+        [
+            f"{quote_identifier(col)} = excluded.{quote_identifier(col)}"
+            for col in frame.columns
+            if col not in key_columns
+        ]
+        + [f"rowid = (SELECT MAX(rowid) FROM {quote_identifier(tablename)}) + 1"]
+    )
+    return f" ON CONFLICT ({keys}) DO UPDATE SET {updates}"
+
+
+def bulk_insert(
+    conn: sqlite3.Connection,
+    tablename: str,
+    frame: pd.DataFrame,
+    upsert_on: list = None,
+) -> int:
+    """Append ``frame`` to ``tablename`` in a single explicit transaction.
+
+    Rows are streamed to ``executemany`` with one prepared INSERT statement,
+    which avoids the per-row overhead of ``DataFrame.to_sql``. The table is
+    created on first use. With ``upsert_on`` the rows replace existing rows
+    with the same values in those columns instead of being appended (and
+    take a new rowid, see :func:`upsert_clause`). Returns
+    the number of rows written.
+    """
+    if frame.empty:
+        return 0
+
+    start = time.perf_counter()
+    columns = ", ".join(quote_identifier(col) for col in frame.columns)
+    placeholders = ", ".join("?" for _ in frame.columns)
+    query = (
+        f"INSERT INTO {quote_identifier(tablename)} ({columns}) VALUES ({placeholders})"
+    )
+    if upsert_on:
+        query += upsert_clause(frame, upsert_on, tablename)
+
+    owns_transaction = not conn.in_transaction
+    if owns_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        create_table_for(conn, tablename, frame)
+        if upsert_on:
+            ensure_unique_key(conn, tablename, upsert_on)
+        conn.executemany(query, _frame_rows(frame))
+        if owns_transaction:
+            conn.commit()
+    except Exception:
+        if owns_transaction:
+            conn.rollback()
+        raise
+
+    action = "Upserted" if upsert_on else "Inserted"
+    logger.debug(
+        f"{action} {len(frame)} rows into {tablename} "
+        f"in {time.perf_counter() - start:.3f}s"
+    )
+    return len(frame)
@@ -0,0 +1,98 @@
+import sqlite3
+import pandas as pd
+import pytest
+
+from common.columnar import (
+    load_processed_data,
+    partitions_of_keys,
+    rewrite_partitioned,
+    rewrite_partitions,
+    write_partitioned,
+)
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def processed_frame():
+    """Processed rows spread over three ingestion dates."""
+    return pd.DataFrame(
+        {
+            "customerid": ["a", "b", "c"],
+            "tenure": [1, 2, 3],
+            "churn": [1, 0, 1],
+            "date": ["2024-01-01", "2024-02-01", "2024-03-01"],
+        }
+    )
+
+
+def test_parquet_projection_and_pruning(tmp_path, processed_frame):
+    """Only the requested columns and date partitions are returned."""
+    root = str(tmp_path / "processed")
+    write_partitioned(processed_frame, root)
+
+    df = load_processed_data(
+        None,
+        "processdata",
+        columns=["customerid", "churn"],
+        start_date="2024-02-01",
+        end_date="2024-03-01",
+        columnar_path=root,
+    )
+
+    assert list(df.columns) == ["customerid", "churn"]
+    assert sorted(df["customerid"]) == ["b", "c"]
+
+
+def test_sql_fallback_pushes_down_filters(tmp_path, processed_frame):
+    """Without a Parquet store the same query runs against SQLite."""
+    conn = sqlite3.connect(":memory:")
+    processed_frame.to_sql("processdata", conn, index=False)
+
+    df = load_processed_data(
+        conn,
+        "processdata",
+        columns=["customerid"],
+        start_date="2024-02-01",
+        columnar_path=str(tmp_path / "missing"),
+    )
+
+    assert df["customerid"].tolist() == ["b", "c"]
+
+
+def test_rewrite_replaces_the_whole_dataset(tmp_path, processed_frame):
+    """A rewrite drops rows that are no longer in the mirrored table."""
+    root = str(tmp_path / "processed")
+    write_partitioned(processed_frame, root)
+    rewrite_partitioned(processed_frame.iloc[1:], root)
+
+    df = load_processed_data(None, "processdata", columnar_path=root)
+
+    assert sorted(df["customerid"]) == ["b", "c"]
+    assert not (tmp_path / "processed.old").exists()
+
+
+def test_rewrite_partitions_touches_only_the_given_dates(tmp_path, processed_frame):
+    """Changed partitions are replaced or dropped; the others keep their files."""
+    root = tmp_path / "processed"
+    write_partitioned(processed_frame, str(root))
+    untouched = sorted((root / "date=2024-03-01").iterdir())
+    conn = sqlite3.connect(":memory:")
+    processed_frame.to_sql("processdata", conn, index=False)
+
+    # Customer a moved from January to February
+    assert partitions_of_keys(
+        conn, "processdata", pd.DataFrame({"customerid": ["a", "x"]}), ["customerid"]
+    ) == {"2024-01-01"}
+    february = processed_frame.iloc[:2].assign(date="2024-02-01")
+    rewrite_partitions(february, str(root), ["2024-01-01", "2024-02-01"])
+
+    df = load_processed_data(None, "processdata", columnar_path=str(root))
+    assert sorted(zip(df["customerid"], df["date"])) == [
+        ("a", "2024-02-01"),
+        ("b", "2024-02-01"),
+        ("c", "2024-03-01"),
+    ]
+    assert not (root / "date=2024-01-01").exists()
+    assert sorted((root / "date=2024-03-01").iterdir()) == untouched
+    assert not (tmp_path / "processed.old").exists()
@@ -0,0 +1,45 @@
+import os
+import yaml
+import pytest
+
+from common.config import clear_config_cache, load_yaml_config
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.dump({"database": {"db_path": "a.db"}}))
+    yield path
+    clear_config_cache()
+
+
+def test_config_parsed_once_until_modified(config_file, monkeypatch):
+    """The file is parsed once and re-parsed only after its mtime changes."""
+    calls = []
+    original = yaml.safe_load
+    monkeypatch.setattr(yaml, "safe_load", lambda f: calls.append(1) or original(f))
+
+    first = load_yaml_config(str(config_file))
+    first["database"]["db_path"] = "mutated.db"
+    second = load_yaml_config(str(config_file))
+
+    assert second["database"]["db_path"] == "a.db"
+    assert len(calls) == 1
+
+    config_file.write_text(yaml.dump({"database": {"db_path": "b.db"}}))
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert load_yaml_config(str(config_file))["database"]["db_path"] == "b.db"
+    assert len(calls) == 2
+
+
+def test_validator_runs_once(config_file):
+    """Validation happens on parse, not on every cached load."""
+    seen = []
+    validator = seen.append
+
+    load_yaml_config(str(config_file), validator=validator)
+    load_yaml_config(str(config_file), validator=validator)
+
+    assert len(seen) == 1
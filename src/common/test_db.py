@@ -0,0 +1,66 @@
+import threading
+import pandas as pd
+import pytest
+
+from common.db import (
+    close_connections,
+    get_connection,
+    get_pool,
+    iter_table,
+    read_table,
+    release_connections,
+)
+
+
+def test_connections_are_shared_across_threads_and_bounded(tmp_path):
+    """Short-lived threads reuse pooled connections, up to the pool size."""
+    dbpath = str(tmp_path / "customer.db")
+    conn = get_connection(dbpath)
+    assert get_connection(dbpath) is conn
+    release_connections()
+
+    seen = []
+
+    def request():
+        seen.append(get_connection(dbpath))
+        release_connections()
+
+    for _ in range(5):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+    assert set(map(id, seen)) == {id(conn)}
+
+    pool = get_pool(dbpath)
+    held = [pool.acquire() for _ in range(pool.size)]
+    assert pool.opened == pool.size
+    pool.timeout = 0.01
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    for other in held:
+        pool.release(other)
+    close_connections()
+    assert pool.opened == 0
+
+
+def test_typed_and_chunked_reads(tmp_path):
+    """Reads apply explicit dtypes and can iterate a table in chunks."""
+    conn = get_connection(str(tmp_path / "customer.db"))
+    pd.DataFrame({"tenure": [1, 2, 3], "churn": [0, 1, 0]}).to_sql(
+        "processdata", conn, index=False
+    )
+
+    df = read_table(
+        conn,
+        "processdata",
+        columns=["churn"],
+        where="tenure > ?",
+        params=(1,),
+        dtypes={"churn": "int8"},
+    )
+    assert df["churn"].dtype == "int8"
+    assert df["churn"].tolist() == [1, 0]
+
+    chunks = list(iter_table(conn, "processdata", chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    close_connections()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction import DictVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from common.encoders import FrameEncoder, encoder_input
+
+
+def sample_frame():
+    return pd.DataFrame(
+        {
+            "gender": pd.Series(["male", "female", "female", None], dtype="category"),
+            "contract": ["month-to-month", "one_year", "two_year", "one_year"],
+            "seniorcitizen": [0, 1, 0, 1],
+            "tenure": [1.0, 24.0, np.nan, 60.0],
+        }
+    )
+
+
+def test_matches_dict_vectorizer():
+    frame = sample_frame()
+    encoder = FrameEncoder().fit(frame)
+    records = frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+    records = [{k: v for k, v in row.items() if v is not None} for row in records]
+    vectorizer = DictVectorizer(sparse=False).fit(records)
+
+    assert list(encoder.get_feature_names_out()) == list(
+        vectorizer.get_feature_names_out()
+    )
+    np.testing.assert_allclose(
+        encoder.transform(frame), np.nan_to_num(vectorizer.transform(records))
+    )
+
+
+def test_unseen_categories_and_missing_columns_encode_as_zeros():
+    encoder = FrameEncoder().fit(sample_frame())
+    new = pd.DataFrame({"contract": ["lifetime"], "tenure": [3]})
+
+    out = encoder.transform(new)
+
+    assert out.dtype == np.float32
+    names = list(encoder.get_feature_names_out())
+    assert out[0, names.index("tenure")] == 3
+    assert out.sum() == 3
+
+
+def test_encoder_input_matches_model_type():
+    frame = sample_frame().fillna({"tenure": 0, "gender": "male"})
+    y = [0, 1, 0, 1]
+    frame_model = make_pipeline(FrameEncoder(), LogisticRegression()).fit(frame, y)
+    dict_model = make_pipeline(DictVectorizer(), LogisticRegression()).fit(
+        frame.to_dict(orient="records"), y
+    )
+
+    assert encoder_input(frame_model, frame) is frame
+    assert isinstance(encoder_input(dict_model, frame), list)
+    np.testing.assert_array_equal(
+        frame_model.predict(encoder_input(frame_model, frame)),
+        dict_model.predict(encoder_input(dict_model, frame)),
+    )
@@ -0,0 +1,74 @@
+import threading
+import pytest
+
+from common.jobs import CANCELLED, SUCCEEDED, JobCancelled, JobManager
+
+
+def wait_until_finished(job, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if job.finished_at is not None:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job.id} did not finish")
+
+
+def test_keyed_jobs_are_deduplicated_while_active():
+    release = threading.Event()
+    manager = JobManager(max_workers=1)
+
+    first, created = manager.submit_unique("train", lambda job: release.wait(5), key="t")
+    second, created_again = manager.submit_unique("train", lambda job: None, key="t")
+    release.set()
+    wait_until_finished(first)
+    third = manager.submit("train", lambda job: None, key="t")
+
+    assert created and not created_again
+    assert second is first
+    assert third is not first
+    manager.shutdown()
+
+
+def test_cancel_stops_running_job_at_next_step():
+    started, proceed = threading.Event(), threading.Event()
+
+    def steps(job):
+        job.update(total=10, completed=0)
+        for _ in range(10):
+            started.set()
+            proceed.wait(5)
+            job.advance()
+        return "done"
+
+    manager = JobManager(max_workers=1)
+    job = manager.submit("train", steps)
+    started.wait(5)
+    manager.cancel(job.id)
+    proceed.set()
+    wait_until_finished(job)
+
+    assert job.status == CANCELLED
+    assert job.progress["completed"] == 1
+    assert job.to_dict()["cancel_requested"]
+    assert manager.cancel("unknown") is None
+    manager.shutdown()
+
+
+def test_eta_is_extrapolated_from_completed_steps():
+    seen = {}
+
+    def steps(job):
+        job.update(total=4, completed=0)
+        job.advance(2)
+        seen.update(job.to_dict())
+
+    manager = JobManager(max_workers=1)
+    job = manager.submit("train", steps)
+    wait_until_finished(job)
+
+    assert job.status == SUCCEEDED
+    assert seen["eta_seconds"] is not None and seen["eta_seconds"] >= 0
+    assert job.to_dict()["eta_seconds"] is None
+    with pytest.raises(JobCancelled):
+        job.cancel()
+        job.check_cancelled()
+    manager.shutdown()
@@ -0,0 +1,66 @@
+import sqlite3
+import pytest
+
+from common.migrations import ensure_indexes, full_scans
+
+# The queries the services run on their hot paths
+HOT_QUERIES = [
+    # training: latest rows for the training set
+    ("SELECT * FROM processdata ORDER BY date DESC LIMIT 10000", ()),
+    # deployment: look up customers
+    ("SELECT * FROM processdata WHERE customerid = ?", ("0001-A",)),
+    # monitoring: prediction logs of one model
+    ("SELECT rowid - 1 AS row_index, * FROM prediction_logs WHERE model = ?", ("x",)),
+    ("SELECT * FROM prediction_logs WHERE model_name = ?", ("Production",)),
+    ("SELECT * FROM prediction_logs WHERE prediction_date >= ?", ("2024-01-01",)),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE processdata (customerid TEXT, tenure INTEGER, date TEXT)")
+    conn.execute(
+        "CREATE TABLE prediction_logs (customerid TEXT, model TEXT, "
+        "model_name TEXT, predicted INTEGER, prediction_date TEXT)"
+    )
+    yield conn
+    conn.close()
+
+
+def test_hot_queries_scan_without_indexes(conn):
+    assert all(full_scans(conn, query, params) for query, params in HOT_QUERIES)
+
+
+def test_hot_queries_use_indexes(conn):
+    created = ensure_indexes(conn)
+
+    assert "idx_processdata_date" in created
+    assert "idx_prediction_logs_model" in created
+    for query, params in HOT_QUERIES:
+        assert full_scans(conn, query, params) == [], query
+
+
+def test_ensure_indexes_is_idempotent(conn):
+    first = ensure_indexes(conn)
+    second = ensure_indexes(conn)
+
+    assert first == second
+    indexes = conn.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'index'"
+    ).fetchone()[0]
+    assert indexes == len(first)
+
+
+def test_unique_key_replaces_the_single_column_index(conn):
+    ensure_indexes(conn)
+    conn.execute(
+        "CREATE UNIQUE INDEX uq_processdata_customerid ON processdata (customerid)"
+    )
+
+    created = ensure_indexes(conn)
+
+    assert "idx_processdata_customerid" not in created
+    assert "idx_processdata_date" in created
+    names = {row[1] for row in conn.execute("PRAGMA index_list(processdata)")}
+    assert names == {"uq_processdata_customerid", "idx_processdata_date"}
@@ -0,0 +1,119 @@
+import sqlite3
+import pandas as pd
+
+from common.schema import (
+    apply_schema,
+    infer_schema,
+    load_schema,
+    resolve_schema,
+    widen_schema,
+)
+
+
+def sample_frame():
+    return pd.DataFrame(
+        {
+            "customerid": [f"id-{i}" for i in range(1000)],
+            "gender": ["male", "female"] * 500,
+            "seniorcitizen": [0, 1] * 500,
+            "tenure": [i % 72 for i in range(1000)],
+            "monthlycharges": [float(i) + 0.5 for i in range(1000)],
+        }
+    )
+
+
+def test_infer_schema_picks_compact_dtypes():
+    schema = infer_schema(sample_frame())
+
+    assert schema == {
+        "gender": "category",
+        "seniorcitizen": "int8",
+        "tenure": "int8",
+        "monthlycharges": "float32",
+    }
+
+
+def test_apply_schema_ignores_unknown_columns_and_can_keep_floats():
+    frame = sample_frame()
+    schema = {**infer_schema(frame), "missing": "int8"}
+
+    narrowed = apply_schema(frame, schema)
+    kept = apply_schema(frame, schema, narrow_floats=False)
+
+    assert narrowed["gender"].dtype == "category"
+    assert narrowed["monthlycharges"].dtype == "float32"
+    assert kept["monthlycharges"].dtype == "float64"
+    assert narrowed.memory_usage(deep=True).sum() < frame.memory_usage(deep=True).sum()
+
+
+def test_resolve_schema_stores_once_and_declared_wins():
+    conn = sqlite3.connect(":memory:")
+    declared = {"tenure": "int16"}
+
+    schema = resolve_schema(conn, "processdata", declared, sample_frame())
+    assert schema["tenure"] == "int16"
+    assert load_schema(conn, "processdata") == schema
+
+    # Later calls reuse the stored schema without a sample
+    assert resolve_schema(conn, "processdata") == schema
+    assert load_schema(conn, "otherdata") == {}
+
+
+def test_small_first_batch_does_not_make_ids_and_dates_categories():
+    batch = pd.DataFrame(
+        {"customerid": ["a", "b"], "date": ["2024-01-01"] * 2, "tenure": [1, 2]}
+    )
+
+    assert infer_schema(batch) == {"tenure": "int8"}
+
+
+def test_later_batches_widen_the_stored_schema():
+    conn = sqlite3.connect(":memory:")
+    resolve_schema(conn, "processdata", sample=sample_frame())
+    batch = pd.DataFrame(
+        {
+            "gender": [f"g{i}" for i in range(100)],
+            "seniorcitizen": [0] * 100,
+            "tenure": [300] * 99 + [None],
+            "monthlycharges": [1.5] * 100,
+        }
+    )
+
+    schema = resolve_schema(conn, "processdata", sample=batch)
+    cast = apply_schema(batch, schema, narrow_floats=False)
+
+    assert "gender" not in schema
+    assert schema["seniorcitizen"] == "int8"
+    assert schema["tenure"] == "float64"
+    assert cast["tenure"].max() == 300
+    assert load_schema(conn, "processdata") == schema
+    assert widen_schema({"tenure": "int8"}, pd.DataFrame({"tenure": [300]})) == {
+        "tenure": "int16"
+    }
+
+
+def test_ids_dates_and_keys_never_become_categories():
+    rows = 1000
+    batch = pd.DataFrame(
+        {
+            "customerid": ["a", "b"] * (rows // 2),
+            "date": ["2024-01-01"] * rows,
+            "account": ["x", "y"] * (rows // 2),
+        }
+    )
+
+    assert infer_schema(batch) == {"account": "category"}
+    assert infer_schema(batch, exclude=("customerid", "date", "account")) == {}
+    # A key stored as a category by an older schema goes back to text
+    assert widen_schema({"customerid": "category"}, batch) == {"account": "category"}
+
+
+def test_integers_meeting_floats_widen_to_float64():
+    floats = pd.DataFrame({"tenure": pd.Series([1.5, 2.5], dtype="float32")})
+    ints = pd.DataFrame({"tenure": [2**24 + 1, 3]})
+    with_nulls = pd.DataFrame({"tenure": [2**24 + 1, None]})
+
+    assert widen_schema({"tenure": "int64"}, floats) == {"tenure": "float64"}
+    assert widen_schema({"tenure": "float32"}, ints) == {"tenure": "float64"}
+    assert infer_schema(with_nulls) == {"tenure": "float64"}
+    assert widen_schema({"tenure": "float64"}, floats) == {"tenure": "float64"}
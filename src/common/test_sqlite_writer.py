@@ -0,0 +1,87 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+
+from common.sqlite_writer import (
+    bulk_insert,
+    collapse_duplicate_keys,
+    configure_connection,
+)
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Configured connection to a SQLite file database."""
+    conn = configure_connection(sqlite3.connect(str(tmp_path / "customer.db")))
+    yield conn
+    conn.close()
+
+
+def test_configure_connection_enables_wal(file_db):
+    """The shared connection settings switch the database to WAL."""
+    assert file_db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert file_db.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+
+
+def test_bulk_insert_creates_and_appends(file_db):
+    """Rows are appended to an auto-created table with NULLs for missing values."""
+    frame = pd.DataFrame(
+        {"customerid": ["a", "b"], "totalcharges": [1.5, np.nan], "churn": [1, 0]}
+    )
+
+    assert bulk_insert(file_db, "processdata", frame) == 2
+    assert bulk_insert(file_db, "processdata", frame) == 2
+
+    rows = file_db.execute("SELECT * FROM processdata").fetchall()
+    assert rows == [("a", 1.5, 1), ("b", None, 0)] * 2
+    assert not file_db.in_transaction
+
+
+def test_bulk_insert_rolls_back_on_error(file_db):
+    """A failing batch leaves no partial rows behind."""
+    bulk_insert(file_db, "logs", pd.DataFrame({"model": ["m1"]}))
+
+    with pytest.raises(sqlite3.OperationalError):
+        bulk_insert(file_db, "logs", pd.DataFrame({"model": ["m2"], "extra": [1]}))
+
+    assert file_db.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == 1
+
+
+def test_bulk_insert_upsert_replaces_rows_by_key(file_db):
+    """Upserts keep one row per key; existing duplicates need a migration."""
+    first = pd.DataFrame({"customerid": ["a", "b"], "tenure": [1, 2]})
+    bulk_insert(file_db, "processdata", first)
+    bulk_insert(file_db, "processdata", first)
+
+    second = pd.DataFrame({"customerid": ["b", "c"], "tenure": [20, 30]})
+    with pytest.raises(ValueError, match="2 rows"):
+        bulk_insert(file_db, "processdata", second, upsert_on=["customerid"])
+    assert file_db.execute("SELECT COUNT(*) FROM processdata").fetchone()[0] == 4
+
+    assert collapse_duplicate_keys(file_db, "processdata", ["customerid"]) == 2
+    bulk_insert(file_db, "processdata", second, upsert_on=["customerid"])
+    bulk_insert(file_db, "processdata", second, upsert_on=["customerid"])
+
+    rows = file_db.execute(
+        "SELECT customerid, tenure FROM processdata ORDER BY customerid"
+    ).fetchall()
+    assert rows == [("a", 1), ("b", 20), ("c", 30)]
+
+
+def test_upserted_rows_move_past_the_rowid_watermark(file_db):
+    """Updated rows take a new highest rowid, like inserted ones."""
+    bulk_insert(file_db, "processdata", pd.DataFrame({"customerid": ["a", "b", "c"]}))
+    watermark = file_db.execute("SELECT MAX(rowid) FROM processdata").fetchone()[0]
+
+    bulk_insert(
+        file_db,
+        "processdata",
+        pd.DataFrame({"customerid": ["c", "d"]}),
+        upsert_on=["customerid"],
+    )
+
+    rows = file_db.execute(
+        "SELECT customerid FROM processdata WHERE rowid > ? ORDER BY rowid", (watermark,)
+    ).fetchall()
+    assert rows == [("c",), ("d",)]
@@ -0,0 +1,112 @@
+"""Benchmark process_dataframe on synthetic customer data.
+
+Usage (from any directory; the script finds ``common`` under src/ itself):
+    python src/data_ingest/benchmark_processing.py    # 10k, 1M and 10M rows
+    python src/data_ingest/benchmark_processing.py --rows 10000 1000000 --compare
+
+``--compare`` also times the previous row-wise implementation and checks that
+both produce the same frame.
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# utils imports the shared ``common`` package, which sits next to the
+# services under src/ (as in conftest.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import process_dataframe
+
+CATEGORIES = {
+    "gender": ["Female", "Male"],
+    "Partner": ["Yes", "No"],
+    "Dependents": ["Yes", "No"],
+    "PhoneService": ["Yes", "No"],
+    "MultipleLines": ["Yes", "No", "No phone service"],
+    "InternetService": ["DSL", "Fiber optic", "No"],
+    "OnlineSecurity": ["Yes", "No", "No internet service"],
+    "OnlineBackup": ["Yes", "No", "No internet service"],
+    "DeviceProtection": ["Yes", "No", "No internet service"],
+    "TechSupport": ["Yes", "No", "No internet service"],
+    "StreamingTV": ["Yes", "No", "No internet service"],
+    "StreamingMovies": ["Yes", "No", "No internet service"],
+    "Contract": ["Month-to-month", "One year", "Two year"],
+    "PaperlessBilling": ["Yes", "No"],
+    "PaymentMethod": [
+        "Electronic check",
+        "Mailed check",
+        "Bank transfer (automatic)",
+        "Credit card (automatic)",
+    ],
+    "Churn": ["Yes", "No"],
+}
+
+
+def make_raw_data(rows: int, seed: int = 11) -> pd.DataFrame:
+    """Build a raw frame shaped like the Telco churn extract."""
+    rng = np.random.default_rng(seed)
+    frame = {"customerID": np.char.add("C", np.arange(rows).astype(str)).astype(object)}
+    for name, values in CATEGORIES.items():
+        frame[name] = np.array(values, dtype=object)[rng.integers(len(values), size=rows)]
+    frame["SeniorCitizen"] = rng.integers(2, size=rows)
+    frame["tenure"] = rng.integers(72, size=rows)
+    frame["MonthlyCharges"] = rng.uniform(18, 120, size=rows).round(2)
+    # The extract stores TotalCharges as text with a few blanks
+    charges = pd.Series(rng.uniform(18, 8000, size=rows).round(2)).astype(str)
+    charges[rng.random(rows) < 0.001] = " "
+    frame["TotalCharges"] = charges.to_numpy(dtype=object)
+    return pd.DataFrame(frame)
+
+
+def process_dataframe_rowwise(dataframe, target_col, drop_cols=None):
+    """The previous implementation, kept as the benchmark baseline."""
+    df = dataframe.copy()
+    df.columns = df.columns.str.replace(" ", "_").str.lower()
+    target_col = target_col.lower()
+    for col in df.select_dtypes(include=["object"]).columns:
+        df[col] = df[col].str.replace(" ", "_").str.lower()
+    if drop_cols:
+        df = df.drop([col.lower() for col in drop_cols], axis=1)
+    if "totalcharges" in df.columns:
+        df = df[df["totalcharges"] != "_"]
+        df["totalcharges"] = df["totalcharges"].astype("float64")
+    if target_col in df.columns:
+        df["churn"] = (df[target_col] == "yes").astype(int)
+        if target_col != "churn":
+            df = df.drop(columns=[target_col])
+    return df
+
+
+def time_call(func, raw):
+    start = time.perf_counter()
+    result = func(raw, "Churn", drop_cols=[])
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'engine':>10} {'seconds':>9} {'rows/sec':>14}")
+    for rows in args.rows:
+        raw = make_raw_data(rows)
+        result, elapsed = time_call(process_dataframe, raw)
+        print(f"{rows:>12,} {'vectorized':>10} {elapsed:>9.3f} {rows / elapsed:>14,.0f}")
+
+        if args.compare:
+            expected, elapsed = time_call(process_dataframe_rowwise, raw)
+            print(f"{rows:>12,} {'rowwise':>10} {elapsed:>9.3f} {rows / elapsed:>14,.0f}")
+            pd.testing.assert_frame_equal(result, expected)
+            del expected
+        del raw, result
+
+
+if __name__ == "__main__":
+    main()
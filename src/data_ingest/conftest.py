@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The shared ``common`` package sits next to the services under src/ (it is
+# copied to /app/common in the Docker image), so make it importable here too.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -1,11 +1,37 @@
 import os
-import yaml
+import json
+import uuid
 import logging
 import pandas as pd
 from io import StringIO
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
-from utils import push_data_to_db, process_dataframe, pull_data_from_db, connect_sqlite
+from flask import Flask, Response, request, jsonify, stream_with_context
+from common.db import get_connection, read_table, release_connections
+from common.config import load_yaml_config
+from common.schema import NON_CATEGORY_COLUMNS, apply_schema, resolve_schema
+from common.columnar import (
+    PARTITION_COLUMN,
+    partitions_of_keys,
+    rewrite_partitions,
+    write_partitioned,
+)
+from common.jobs import JobManager
+from common.migrations import ensure_indexes, migrate
+from common.sqlite_writer import collapse_duplicate_keys, quote_identifier
+from validation import build_validator
+from utils import (
+    push_data_to_db,
+    push_upload_to_db,
+    is_supported_upload,
+    upload_suffix,
+    push_data_with_watermark,
+    process_dataframe,
+    pull_data_from_db,
+    pull_new_rows,
+    get_watermark,
+    table_columns,
+    iter_table_rows,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -19,29 +45,85 @@ load_dotenv()
 def load_config():
     config_path = os.getenv("config_path")
     try:
-        with open(config_path) as f:
-            return yaml.safe_load(f)
+        return load_yaml_config(config_path)
     except Exception as e:
         logger.error(f"Error loading configuration: {str(e)}")
         raise
 
 
 def get_db_engine():
+    """Return the calling thread's pooled connection to the customer database."""
     config = load_config()
-    return connect_sqlite(config["database"]["db_path"])
+    return get_connection(config["database"]["db_path"])
 
 
-def create_app(engine=None):
+def create_app(engine=None, jobs=None):
     app = Flask("Data Ingestion and Processing")
-    if engine is None:
-        engine = get_db_engine()
+    # Return pooled database connections at the end of every request
+    app.teardown_appcontext(release_connections)
+    if jobs is None:
+        jobs_config = load_config().get("jobs", {})
+        jobs = JobManager(max_workers=jobs_config.get("workers", 2))
+    app.config["jobs"] = jobs
+
+    def db():
+        """Connection for the current request or job thread.
+
+        Uses the engine passed to ``create_app`` (tests) and otherwise the
+        thread's pooled connection.
+        """
+        return engine if engine is not None else get_db_engine()
+
+    migrate(db())
+    release_connections()
+
+    def ingest_upload(job, paths, table_name, chunksize, dedupe, validator):
+        """Stream spooled (possibly compressed) uploads into the raw table.
+
+        The spooled files are removed afterwards.
+        """
+        totals = {
+            "rows": 0,
+            "chunks": 0,
+            "skipped_chunks": 0,
+            "rejected_rows": 0,
+            "files": 0,
+            "validation_seconds": [],
+        }
+        try:
+            for done, path in enumerate(paths, 1):
+                offset = dict(totals)
+                stats = push_upload_to_db(
+                    db(),
+                    tablename=table_name,
+                    path=path,
+                    chunksize=chunksize,
+                    dedupe=dedupe,
+                    validator=validator,
+                    progress=lambda rows, chunks: job.update(
+                        rows_processed=offset["rows"] + rows,
+                        chunks=offset["chunks"] + chunks,
+                    ),
+                )
+                for key in totals:
+                    totals[key] += stats[key]
+                job.update(uploads_done=done, rows_rejected=totals["rejected_rows"])
+            return totals
+        finally:
+            for path in paths:
+                os.remove(path)
+
+    def process_job(job):
+        rows = process(db())
+        job.update(rows_processed=rows)
+        return {"rows": rows}
 
     @app.route("/process", methods=["GET"])
     def process_existing_data():
         """Process data already in the database"""
         try:
-            ingest(engine)
-            process(engine)
+            ingest(db())
+            process(db())
             return jsonify(
                 {"status": "success", "message": "Successfully processed existing data"}
             )
@@ -57,54 +139,82 @@ def create_app(engine=None):
             if "file" not in request.files:
                 return jsonify({"status": "error", "message": "No file part"}), 400
 
-            file = request.files["file"]
+            files = request.files.getlist("file")
 
             # Check if file is empty
-            if file.filename == "":
+            if any(file.filename == "" for file in files):
                 return jsonify({"status": "error", "message": "No selected file"}), 400
 
-            # Read the file into a pandas DataFrame
-            if file and file.filename.endswith(".csv"):
-                # Read CSV file into DataFrame
-                df = pd.read_csv(file)
-
-                # Get table name from config
-                config = load_config()
-                table_name = config["data"]["raw_data"]["name"]
-
-                # Push data to database
-                push_data_to_db(engine, tablename=table_name, data=df)
-
-                return jsonify(
-                    {
-                        "status": "success",
-                        "message": "Data uploaded successfully",
-                        "rows": len(df),
-                    }
-                )
-            else:
+            if not all(is_supported_upload(file.filename) for file in files):
                 return (
                     jsonify(
                         {
                             "status": "error",
-                            "message": "Invalid file format. Please upload a CSV file.",
+                            "message": "Invalid file format. Please upload CSV "
+                            "files, optionally as .csv.gz or .zip.",
                         }
                     ),
                     400,
                 )
 
+            # Get table name and chunk size from config
+            config = load_config()
+            raw_data = config["data"]["raw_data"]
+            table_name = raw_data["name"]
+            chunksize = raw_data.get("chunksize", 50000)
+            dedupe = raw_data.get("dedupe", False)
+
+            # Spool the uploads to disk as received (compressed files stay
+            # compressed) and ingest them in the background
+            upload_dir = config.get("jobs", {}).get("upload_dir", "./data/uploads")
+            os.makedirs(upload_dir, exist_ok=True)
+            paths = []
+            for file in files:
+                suffix = upload_suffix(file.filename)
+                paths.append(os.path.join(upload_dir, f"{uuid.uuid4().hex}{suffix}"))
+                file.save(paths[-1])
+
+            validator = build_validator(config["data"].get("validation"))
+            job = jobs.submit(
+                "upload",
+                ingest_upload,
+                paths,
+                table_name,
+                chunksize,
+                dedupe,
+                validator,
+            )
+            job.update(uploads=len(paths))
+
+            return (
+                jsonify(
+                    {
+                        "status": "accepted",
+                        "message": f"Upload of {len(paths)} file(s) queued",
+                        "job_id": job.id,
+                    }
+                ),
+                202,
+            )
+
         except Exception as e:
             logger.error(f"Error uploading data: {str(e)}")
             return jsonify({"status": "error", "message": str(e)}), 500
 
     @app.route("/process_uploaded", methods=["POST"])
     def process_uploaded_data():
-        """Process uploaded data directly without saving to raw table first"""
+        """Queue processing of the uploaded raw data"""
         try:
-
-            process(engine)
-            return jsonify(
-                {"status": "success", "message": "Successfully processed existing data"}
+            job = jobs.submit("process", process_job)
+            return (
+                jsonify(
+                    {
+                        "status": "accepted",
+                        "message": "Data processing queued",
+                        "job_id": job.id,
+                    }
+                ),
+                202,
             )
             # Check if a file was uploaded
             # if 'job_id' not in request.keys():
@@ -145,9 +255,31 @@ def create_app(engine=None):
             logger.error(f"Error processing uploaded data: {str(e)}")
             return jsonify({"status": "error", "message": str(e)}), 500
 
+    @app.route("/jobs/<job_id>", methods=["GET"])
+    def job_status(job_id):
+        """Report the status, progress and timing of a background job"""
+        job = jobs.get(job_id)
+        if job is None:
+            return (
+                jsonify({"status": "error", "message": f"Unknown job {job_id}"}),
+                404,
+            )
+        return jsonify(job.to_dict())
+
     @app.route("/get_data", methods=["GET"])
     def get_data():
-        """Retrieve data from a specified table"""
+        """Retrieve a page of rows from a specified table
+
+        Query parameters:
+            table: table to read (required)
+            columns: comma-separated columns to return (default: all)
+            after: return rows with a rowid greater than this cursor
+            limit: page size, capped at the configured maximum
+            format: "json" (default) or "ndjson" to stream one record per line
+
+        A missing or empty table returns 404; a page after the last row
+        returns 200 with no data and no ``next_cursor``.
+        """
         try:
             table_name = request.args.get("table")
             if not table_name:
@@ -156,10 +288,18 @@ def create_app(engine=None):
                     400,
                 )
 
-            # Pull data from database
-            df = pull_data_from_db(engine, tablename=table_name)
-
-            if df is None or df.empty:
+            connection = db()
+            available = table_columns(connection, table_name)
+            after = request.args.get("after", 0, type=int)
+            # A missing or empty table is a 404, as before pagination; an
+            # empty page after a cursor is just the end of the table
+            if not available or (
+                not after
+                and connection.execute(
+                    f"SELECT 1 FROM {quote_identifier(table_name)} LIMIT 1"
+                ).fetchone()
+                is None
+            ):
                 return (
                     jsonify(
                         {
@@ -170,12 +310,56 @@ def create_app(engine=None):
                     404,
                 )
 
-            # Convert DataFrame to JSON and return
+            columns = available
+            if request.args.get("columns"):
+                columns = [col.strip() for col in request.args["columns"].split(",")]
+                unknown = [col for col in columns if col not in available]
+                if unknown:
+                    return (
+                        jsonify(
+                            {
+                                "status": "error",
+                                "message": f"Unknown columns for {table_name}: {unknown}",
+                            }
+                        ),
+                        400,
+                    )
+
+            api_config = load_config().get("api", {})
+            max_page_size = api_config.get("max_page_size", 10000)
+            limit = request.args.get(
+                "limit", api_config.get("page_size", 1000), type=int
+            )
+            limit = max(1, min(limit, max_page_size))
+
+            if request.args.get("format") == "ndjson":
+                # Stream the rest of the table; the limit only applies if given
+                stream_limit = limit if "limit" in request.args else None
+                rows = iter_table_rows(
+                    connection,
+                    table_name,
+                    columns,
+                    after_rowid=after,
+                    limit=stream_limit,
+                )
+                lines = (json.dumps(record) + "\n" for _, record in rows)
+                return Response(
+                    stream_with_context(lines), mimetype="application/x-ndjson"
+                )
+
+            records, next_cursor = [], None
+            for rowid, record in iter_table_rows(
+                connection, table_name, columns, after_rowid=after, limit=limit
+            ):
+                records.append(record)
+                next_cursor = rowid
+
             return jsonify(
                 {
                     "status": "success",
-                    "data": df.to_dict(orient="records"),
-                    "rows": len(df),
+                    "data": records,
+                    "rows": len(records),
+                    "next_cursor": next_cursor if len(records) == limit else None,
                 }
             )
 
@@ -191,8 +375,18 @@ def ingest(engine):
     data = config["data"]
     data_path = data["raw_data"]["path"]
     table_name = data["raw_data"]["name"]
+    chunksize = data["raw_data"].get("chunksize")
+    dedupe = data["raw_data"].get("dedupe", False)
     logging.info("Ingesting data to database")
-    push_data_to_db(engine, tablename=table_name, dfpath=data_path)
+    push_data_to_db(
+        engine,
+        tablename=table_name,
+        dfpath=data_path,
+        chunksize=chunksize,
+        dedupe=dedupe,
+        validator=build_validator(data.get("validation")),
+    )
+    ensure_indexes(engine, [table_name])
     logging.info("Ingestion Successful")
 
 
@@ -203,11 +397,164 @@ def process(engine):
     processed_table_name = data["processed_data"]["name"]
     drop_columns = data["processed_data"]["dropcols"]
     target_column = data["processed_data"]["targetcolumn"]
-    input_data = pull_data_from_db(engine, tablename=raw_table_name)
+
+    parquet_path = data["processed_data"].get("parquet_path")
+    schema = data["processed_data"].get("schema")
+    upsert_on = None
+    if data["processed_data"].get("write_mode", "append") == "upsert":
+        upsert_on = data["processed_data"].get("upsert_key", ["customerid"])
+        # Switching an append table to upsert deletes its older snapshots;
+        # only done when asked for explicitly
+        if data["processed_data"].get("collapse_duplicates", False):
+            collapse_duplicate_keys(engine, processed_table_name, upsert_on)
+
+    if data["processed_data"].get("incremental", False):
+        rows = process_incremental(
+            engine,
+            raw_table_name,
+            processed_table_name,
+            target_column,
+            drop_columns,
+            parquet_path=parquet_path,
+            schema=schema,
+            upsert_on=upsert_on,
+        )
+    else:
+        input_data = pull_data_from_db(engine, tablename=raw_table_name)
+        processed_data = process_dataframe(
+            input_data, target_column, drop_cols=drop_columns
+        )
+        processed_data = apply_table_schema(
+            engine, processed_table_name, processed_data, schema, keys=upsert_on
+        )
+        replaced = replaced_partitions(
+            engine, processed_table_name, processed_data, parquet_path, upsert_on
+        )
+        push_data_to_db(
+            engine,
+            tablename=processed_table_name,
+            data=processed_data,
+            upsert_on=upsert_on,
+        )
+        if parquet_path:
+            write_columnar(
+                engine,
+                processed_table_name,
+                processed_data,
+                parquet_path,
+                upsert_on,
+                replaced,
+            )
+        rows = len(processed_data)
+
+    # The first run creates the table; index it right away
+    ensure_indexes(engine, [processed_table_name])
+    return rows
+
+
+def process_incremental(
+    engine,
+    raw_table_name,
+    processed_table_name,
+    target_column,
+    drop_columns,
+    parquet_path=None,
+    schema=None,
+    upsert_on=None,
+):
+    """Process only the raw rows added since the last run of this source.
+
+    When ``parquet_path`` is set the processed rows are also written to the
+    date-partitioned columnar store. ``upsert_on`` replaces processed rows
+    with the same key instead of appending them.
+    """
+    last_rowid = get_watermark(engine, raw_table_name)
+    input_data, new_rowid = pull_new_rows(engine, raw_table_name, last_rowid)
+    if input_data.empty:
+        logger.info(f"No new rows in {raw_table_name} since rowid {last_rowid}")
+        return 0
+
     processed_data = process_dataframe(
         input_data, target_column, drop_cols=drop_columns
     )
-    push_data_to_db(engine, tablename=processed_table_name, data=processed_data)
+    processed_data = apply_table_schema(
+        engine, processed_table_name, processed_data, schema, keys=upsert_on
+    )
+    replaced = replaced_partitions(
+        engine, processed_table_name, processed_data, parquet_path, upsert_on
+    )
+    push_data_with_watermark(
+        engine,
+        processed_table_name,
+        processed_data,
+        raw_table_name,
+        new_rowid,
+        upsert_on=upsert_on,
+    )
+    if parquet_path:
+        write_columnar(
+            engine,
+            processed_table_name,
+            processed_data,
+            parquet_path,
+            upsert_on,
+            replaced,
+        )
+    logger.info(
+        f"Processed {len(input_data)} new rows of {raw_table_name} "
+        f"(rowid {last_rowid} -> {new_rowid})"
+    )
+    return len(processed_data)
+
+
+def replaced_partitions(engine, tablename, data, parquet_path, upsert_on):
+    """Date partitions an upsert of ``data`` will take rows out of.
+
+    Looked up before the write, while the older rows are still in the table;
+    only needed when the columnar store is kept.
+    """
+    if not (parquet_path and upsert_on):
+        return set()
+    return partitions_of_keys(engine, tablename, data, upsert_on)
+
+
+def write_columnar(engine, tablename, data, parquet_path, upsert_on=None, replaced=()):
+    """Mirror a write to ``tablename`` into the columnar store.
+
+    Appended rows are appended to the store. After an upsert the date
+    partitions of the new rows and the ``replaced`` partitions (those that
+    held older rows of the same keys, see ``partitions_of_keys``) are
+    rewritten from the table; the rest of the store is left as it is.
+    """
+    if upsert_on:
+        values = sorted(set(data[PARTITION_COLUMN].astype(str)) | set(replaced))
+        current = read_table(
+            engine,
+            tablename,
+            where=f"{PARTITION_COLUMN} IN ({', '.join('?' for _ in values)})",
+            params=values,
+        )
+        rewrite_partitions(current, parquet_path, values)
+    else:
+        write_partitioned(data, parquet_path)
+
+
+def apply_table_schema(engine, tablename, data, declared=None, keys=None):
+    """Cast processed data to the table's compact dtypes.
+
+    The stored schema is inferred from the first batch and widened to fit
+    every later one; ``declared`` dtypes from config override it. Floats
+    keep full precision here and are narrowed by the readers. ``keys``
+    (the upsert key) stay plain text, like ids and dates.
+    """
+    schema = resolve_schema(
+        engine,
+        tablename,
+        declared=declared,
+        sample=data,
+        exclude=(*NON_CATEGORY_COLUMNS, *(keys or ())),
+    )
+    return apply_schema(data, schema, narrow_floats=False)
 
 
 # Only run the app directly if main
@@ -1,7 +1,13 @@
+import io
+import gzip
+import zipfile
+import json
+import time
 import pytest
+import numpy as np
 import pandas as pd
 import sqlite3
-from ingestion import ingest, process, create_app
+from ingestion import ingest, process, process_incremental, create_app
 import utils
 
 
@@ -77,6 +83,73 @@ def test_push_and_pull_raw_data(monkeypatch, dummy_dataframe, db_engine):
     assert df.shape == (2, 4)
 
 
+def test_push_csv_in_chunks(tmp_path, dummy_dataframe, db_engine):
+    """Stream a CSV file into the DB in several chunks."""
+    csv_path = tmp_path / "raw.csv"
+    dummy_dataframe.to_csv(csv_path, index=False)
+
+    stats = utils.push_data_to_db(
+        db_engine, "raw_table", dfpath=str(csv_path), chunksize=1
+    )
+    df = utils.pull_data_from_db(db_engine, "raw_table")
+
+    assert stats["rows"] == 2
+    assert stats["chunks"] == 2
+    assert stats["rows_per_sec"] > 0
+    assert list(df.columns) == ["CustomerID", "TotalCharges", "Churn", "date"]
+    assert df.shape == (2, 4)
+
+
+def test_push_csv_skips_already_ingested_content(tmp_path, dummy_dataframe, db_engine):
+    """Re-ingesting a file or its chunks does not duplicate rows."""
+    first = tmp_path / "first.csv"
+    dummy_dataframe.to_csv(first, index=False)
+    extended = tmp_path / "extended.csv"
+    pd.concat([dummy_dataframe, dummy_dataframe.iloc[:1].assign(CustomerID=3)]).to_csv(
+        extended, index=False
+    )
+
+    stats = utils.push_csv_chunks_to_db(db_engine, "raw_table", str(first), 2, dedupe=True)
+    assert stats["rows"] == 2
+
+    again = utils.push_csv_chunks_to_db(db_engine, "raw_table", str(first), 2, dedupe=True)
+    assert again["skipped_file"] and again["rows"] == 0
+
+    overlap = utils.push_csv_chunks_to_db(
+        db_engine, "raw_table", str(extended), 2, dedupe=True
+    )
+    assert overlap["skipped_chunks"] == 1
+    assert overlap["rows"] == 1
+
+    df = utils.pull_data_from_db(db_engine, "raw_table")
+    # Raw columns are stored as text; numbers are parsed by processing
+    assert df["CustomerID"].tolist() == ["1", "2", "3"]
+
+
+def test_blank_charges_after_first_chunk_survive_processing(tmp_path, db_engine):
+    """Chunks read with their own dtypes used to turn charges into NaN."""
+    csv_path = tmp_path / "raw.csv"
+    pd.DataFrame(
+        {
+            "CustomerID": ["a", "b", "c", "d"],
+            "tenure": [1, 2, 0, 4],
+            "TotalCharges": ["100.0", "200.0", " ", "50.5"],
+            "Churn": ["Yes", "No", "No", "Yes"],
+        }
+    ).to_csv(csv_path, index=False)
+
+    utils.push_csv_chunks_to_db(db_engine, "raw_table", str(csv_path), chunksize=2)
+    assert process_incremental(
+        db_engine, "raw_table", "processed_table", "Churn", []
+    ) == 3
+
+    df = utils.pull_data_from_db(db_engine, "processed_table")
+    assert df["customerid"].tolist() == ["a", "b", "d"]
+    assert df["totalcharges"].tolist() == [100.0, 200.0, 50.5]
+    assert df["tenure"].tolist() == [1, 2, 4]
+    assert df["churn"].tolist() == [1, 0, 1]
+
+
 def test_process_dataframe(dummy_dataframe, expected_processed_dataframe):
     """Check if process_dataframe transforms as expected."""
     processed = utils.process_dataframe(
@@ -88,6 +161,15 @@ def test_process_dataframe(dummy_dataframe, expected_processed_dataframe):
     )
 
 
+def test_normalize_categories_matches_str_accessor():
+    """Category-wise normalization equals the row-wise string operations."""
+    column = pd.Series(["Fiber optic", np.nan, "DSL", "Fiber optic", 3, "No"], dtype=object)
+
+    expected = column.str.replace(" ", "_").str.lower()
+
+    pd.testing.assert_series_equal(utils.normalize_categories(column), expected)
+
+
 def test_ingest_function(monkeypatch, dummy_dataframe, db_engine):
     """Run the ingest step and ensure no errors."""
     monkeypatch.setattr(pd, "read_csv", lambda path: dummy_dataframe)
@@ -115,6 +197,56 @@ def test_process_function(seed_raw_table, expected_processed_dataframe):
     )
 
 
+def test_process_incremental_only_new_rows(seed_raw_table, dummy_dataframe):
+    """Repeated incremental runs process each raw row exactly once."""
+    args = ("raw_table", "processed_table", "Churn", ["customerid"])
+
+    assert process_incremental(seed_raw_table, *args) == 2
+    assert process_incremental(seed_raw_table, *args) == 0
+
+    dummy_dataframe.iloc[:1].to_sql(
+        "raw_table", seed_raw_table, index=False, if_exists="append"
+    )
+    assert process_incremental(seed_raw_table, *args) == 1
+
+    df = utils.pull_data_from_db(seed_raw_table, "processed_table")
+    assert df["totalcharges"].tolist() == [100.0, 200.0, 100.0]
+    assert utils.get_watermark(seed_raw_table, "raw_table") == 3
+
+
+def test_process_incremental_upserts_by_customer(seed_raw_table, dummy_dataframe):
+    """In upsert mode re-ingested customers replace their processed rows."""
+    args = ("raw_table", "processed_table", "Churn", [])
+
+    assert process_incremental(seed_raw_table, *args, upsert_on=["customerid"]) == 2
+
+    changed = dummy_dataframe.iloc[:1].assign(TotalCharges="150.0")
+    changed.to_sql("raw_table", seed_raw_table, index=False, if_exists="append")
+    assert process_incremental(seed_raw_table, *args, upsert_on=["customerid"]) == 1
+
+    df = utils.pull_data_from_db(seed_raw_table, "processed_table")
+    assert df.sort_values("customerid")["totalcharges"].tolist() == [150.0, 200.0]
+
+
+def test_process_incremental_upsert_mirrors_changed_partitions(
+    tmp_path, seed_raw_table, dummy_dataframe
+):
+    """The columnar store matches the table after an upsert."""
+    pytest.importorskip("pyarrow")
+    from common.columnar import read_partitioned
+
+    root = str(tmp_path / "processed")
+    args = ("raw_table", "processed_table", "Churn", [])
+    process_incremental(seed_raw_table, *args, parquet_path=root, upsert_on=["customerid"])
+
+    changed = dummy_dataframe.iloc[:1].assign(TotalCharges="150.0")
+    changed.to_sql("raw_table", seed_raw_table, index=False, if_exists="append")
+    process_incremental(seed_raw_table, *args, parquet_path=root, upsert_on=["customerid"])
+
+    df = read_partitioned(root)
+    assert df.sort_values("customerid")["totalcharges"].tolist() == [150.0, 200.0]
+
+
 def test_flask_process_endpoint(
     monkeypatch, seed_raw_table, expected_processed_dataframe
 ):
@@ -135,3 +267,151 @@ def test_flask_process_endpoint(
         df[["totalcharges", "churn"]].reset_index(drop=True),
         expected_processed_dataframe,
     )
+
+
+def test_get_data_paginates_with_cursor(seed_raw_table):
+    """/get_data pages through a table with a rowid cursor and projection."""
+    client = create_app(engine=seed_raw_table).test_client()
+
+    first = client.get("/get_data?table=raw_table&limit=1&columns=CustomerID").json
+    assert first["data"] == [{"CustomerID": 1}]
+    assert first["next_cursor"] == 1
+
+    second = client.get(
+        f"/get_data?table=raw_table&limit=1&columns=CustomerID&after={first['next_cursor']}"
+    ).json
+    assert second["data"] == [{"CustomerID": 2}]
+
+    last = client.get("/get_data?table=raw_table&limit=1&after=2").json
+    assert last["data"] == []
+    assert last["next_cursor"] is None
+
+    response = client.get("/get_data?table=raw_table&columns=missing")
+    assert response.status_code == 400
+
+
+def test_get_data_missing_or_empty_table_is_not_found(seed_raw_table):
+    """Only a page past the end of a table with rows is an empty 200."""
+    seed_raw_table.execute("CREATE TABLE empty_table (customerid TEXT)")
+    client = create_app(engine=seed_raw_table).test_client()
+
+    assert client.get("/get_data?table=missing_table").status_code == 404
+    assert client.get("/get_data?table=empty_table").status_code == 404
+    assert client.get("/get_data?table=empty_table&format=ndjson").status_code == 404
+    assert client.get("/get_data?table=raw_table&after=2").status_code == 200
+
+
+def test_requests_share_a_bounded_connection_pool(monkeypatch, tmp_path, dummy_dataframe):
+    """Each request of the threaded server runs on a new thread."""
+    import threading
+    from common.db import close_connections, get_pool
+    from common.jobs import JobManager
+
+    dbpath = str(tmp_path / "customer.db")
+    monkeypatch.setattr(
+        "ingestion.load_config", lambda: {"database": {"db_path": dbpath}}
+    )
+    with sqlite3.connect(dbpath) as conn:
+        dummy_dataframe.to_sql("raw_table", conn, index=False)
+    client = create_app(jobs=JobManager(max_workers=1)).test_client()
+    statuses = []
+
+    def request():
+        statuses.append(client.get("/get_data?table=raw_table&limit=1").status_code)
+
+    for _ in range(5):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+
+    assert statuses == [200] * 5
+    assert get_pool(dbpath).opened == 1
+    close_connections()
+
+
+def test_get_data_streams_ndjson(seed_raw_table):
+    """format=ndjson streams one JSON record per line."""
+    client = create_app(engine=seed_raw_table).test_client()
+
+    response = client.get("/get_data?table=raw_table&format=ndjson&columns=Churn")
+
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == [{"Churn": "Yes"}, {"Churn": "No"}]
+
+
+def wait_for_job(client, job_id, timeout=10):
+    """Poll /jobs/<id> until the job has finished."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/jobs/{job_id}").json
+        if status["status"] in ("succeeded", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_upload_runs_as_background_job(monkeypatch, tmp_path, dummy_dataframe):
+    """/upload returns a job id at once and the job ingests the file."""
+    config = {
+        "data": {"raw_data": {"name": "raw_table", "chunksize": 1}},
+        "jobs": {"upload_dir": str(tmp_path)},
+    }
+    monkeypatch.setattr("ingestion.load_config", lambda: config)
+    engine = sqlite3.connect(":memory:", check_same_thread=False)
+    client = create_app(engine=engine).test_client()
+
+    payload = io.BytesIO(dummy_dataframe.to_csv(index=False).encode())
+    response = client.post("/upload", data={"file": (payload, "customers.csv")})
+
+    assert response.status_code == 202
+    status = wait_for_job(client, response.json["job_id"])
+    assert status["status"] == "succeeded"
+    assert status["progress"]["rows_processed"] == 2
+    assert status["result"]["rows"] == 2
+    assert utils.pull_data_from_db(engine, "raw_table").shape == (2, 4)
+    assert list(tmp_path.iterdir()) == []
+
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_upload_accepts_compressed_and_multiple_files(
+    monkeypatch, tmp_path, dummy_dataframe
+):
+    """.csv.gz and multi-part .zip uploads are decompressed into the table."""
+    config = {
+        "data": {"raw_data": {"name": "raw_table", "chunksize": 1}},
+        "jobs": {"upload_dir": str(tmp_path)},
+    }
+    monkeypatch.setattr("ingestion.load_config", lambda: config)
+    engine = sqlite3.connect(":memory:", check_same_thread=False)
+    client = create_app(engine=engine).test_client()
+
+    csv = dummy_dataframe.to_csv(index=False).encode()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("part-0.csv", csv)
+        zf.writestr("part-1.csv", csv)
+        zf.writestr("README.txt", "not data")
+    archive.seek(0)
+
+    response = client.post(
+        "/upload",
+        data={
+            "file": [
+                (io.BytesIO(gzip.compress(csv)), "export.csv.gz"),
+                (archive, "export.zip"),
+            ]
+        },
+    )
+
+    assert response.status_code == 202
+    status = wait_for_job(client, response.json["job_id"])
+    assert status["status"] == "succeeded"
+    assert status["result"]["files"] == 3
+    assert status["progress"]["rows_processed"] == 6
+    assert utils.pull_data_from_db(engine, "raw_table").shape == (6, 4)
+    assert list(tmp_path.iterdir()) == []
+
+    bad = client.post("/upload", data={"file": (io.BytesIO(b"x"), "export.tar")})
+    assert bad.status_code == 400
@@ -1,32 +1,56 @@
 import os
+import gzip
+import time
 import yaml
-import sqlite3
+import hashlib
+import zipfile
+import logging
 import datetime
+import numpy as np
 import pandas as pd
 from typing import Optional
 from datetime import datetime
 
 # from prefect import task
 from dotenv import load_dotenv
+from common.db import connect_sqlite, read_sql, read_table, table_columns
+from common.sqlite_writer import bulk_insert, quote_identifier
+from validation import QUARANTINE_TABLE, quarantine_frame
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def connect_sqlite(dbpath: str) -> sqlite3.Connection:
-    """Create and return a SQLite connection."""
-    try:
-        return sqlite3.connect(dbpath, check_same_thread=False)
-    except Exception as e:
-        print(dbpath)
-        print(f"Error connecting to SQLite: {str(e)}")
-        raise
+WATERMARK_TABLE = "ingest_watermarks"
+MANIFEST_TABLE = "ingest_manifest"
+
+# Upload formats; compressed ones are decompressed while they are ingested
+UPLOAD_SUFFIXES = (".csv", ".csv.gz", ".zip")
 
 
 # @task(name="Push data to database")
 def push_data_to_db(
-    db_engine, tablename: str, dfpath: str = None, data: pd.DataFrame = None
+    db_engine,
+    tablename: str,
+    dfpath: str = None,
+    data: pd.DataFrame = None,
+    chunksize: int = None,
+    dedupe: bool = False,
+    upsert_on: list = None,
+    validator=None,
 ) -> None:
-    """Save data to the configured database."""
+    """Save data to the configured database.
+
+    When ``chunksize`` is given together with ``dfpath`` the file is streamed
+    into the table with :func:`push_csv_chunks_to_db` instead of being loaded
+    whole. ``upsert_on`` replaces rows with the same key instead of appending.
+    Rows rejected by ``validator`` go to the quarantine table.
+    """
+    if dfpath and chunksize:
+        return push_csv_chunks_to_db(
+            db_engine, tablename, dfpath, chunksize, dedupe=dedupe, validator=validator
+        )
+
     try:
         now = datetime.now()
         formatted_date = now.strftime("%Y-%m-%d")
@@ -38,23 +62,400 @@ def push_data_to_db(
         if data is None:
             raise ValueError("Either dfpath or data must be provided")
 
+        if validator is not None:
+            data, rejected = validator.validate(data)
+            quarantine_rows(db_engine, tablename, rejected, dfpath)
         data["date"] = formatted_date
-        data.to_sql(tablename, db_engine, if_exists="append", index=False)
+        bulk_insert(db_engine, tablename, data, upsert_on=upsert_on)
     except Exception as e:
         print(f"Error pushing data to database: {str(e)}")
 
 
+def quarantine_rows(db_engine, tablename: str, rejected, source=None) -> int:
+    """Write rows rejected for ``tablename`` to the quarantine table."""
+    if rejected is None or rejected.empty:
+        return 0
+    return bulk_insert(
+        db_engine, QUARANTINE_TABLE, quarantine_frame(rejected, tablename, source)
+    )
+
+
+def ensure_manifest(db_engine) -> None:
+    """Create the table of content hashes of already ingested files and chunks."""
+    db_engine.execute(
+        f"CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} ("
+        "hash TEXT NOT NULL, tablename TEXT NOT NULL, kind TEXT NOT NULL, "
+        "source TEXT, rows INTEGER, ingested_at TEXT, "
+        "PRIMARY KEY (hash, tablename))"
+    )
+
+
+def is_ingested(db_engine, digest: str, tablename: str) -> bool:
+    """Return True if content with this hash was already written to ``tablename``."""
+    row = db_engine.execute(
+        f"SELECT 1 FROM {MANIFEST_TABLE} WHERE hash = ? AND tablename = ?",
+        (digest, tablename),
+    ).fetchone()
+    return row is not None
+
+
+def record_ingested(db_engine, digest, tablename, kind, source, rows) -> None:
+    db_engine.execute(
+        f"INSERT OR IGNORE INTO {MANIFEST_TABLE} "
+        "(hash, tablename, kind, source, rows, ingested_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            digest,
+            tablename,
+            kind,
+            source,
+            rows,
+            datetime.now().isoformat(timespec="seconds"),
+        ),
+    )
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_digest(chunk: pd.DataFrame) -> str:
+    """SHA-256 of a chunk's column names and values."""
+    digest = hashlib.sha256("\x1f".join(map(str, chunk.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(chunk, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def push_csv_chunks_to_db(
+    db_engine,
+    tablename: str,
+    source,
+    chunksize: int = 50000,
+    progress=None,
+    dedupe: bool = False,
+    name: str = None,
+    validator=None,
+) -> dict:
+    """Stream a CSV file or file-like object into a table chunk by chunk.
+
+    Only one chunk is held in memory at a time, and each chunk is written in
+    its own transaction by :func:`bulk_insert`. ``progress``, if given, is
+    called as ``progress(rows, chunks)`` after every chunk. Returns ingestion
+    statistics including the overall throughput in rows per second.
+
+    With ``dedupe`` every chunk is fingerprinted in the ingest manifest and
+    chunks already present in ``tablename`` are skipped; a file path whose
+    whole content was ingested before is skipped after a single hash pass.
+    ``name`` labels a file-like source in the manifest.
+
+    With a ``validator`` (see :mod:`validation`) every chunk is validated
+    column-wise before it is written; rejected rows are written to the
+    quarantine table in the same transaction as the accepted ones.
+    """
+    formatted_date = datetime.now().strftime("%Y-%m-%d")
+    rows, chunks, skipped, rejected_rows = 0, 0, 0, 0
+    validation_seconds = []
+    start = time.perf_counter()
+    is_path = isinstance(source, (str, os.PathLike))
+    source_name = source if is_path else name
+
+    file_hash = None
+    if dedupe:
+        ensure_manifest(db_engine)
+        if is_path:
+            file_hash = file_digest(source_name)
+            if is_ingested(db_engine, file_hash, tablename):
+                logger.info(f"Skipping {source_name}: already ingested into {tablename}")
+                return {
+                    "rows": 0,
+                    "chunks": 0,
+                    "skipped_chunks": 0,
+                    "skipped_file": True,
+                    "rejected_rows": 0,
+                    "seconds": round(time.perf_counter() - start, 3),
+                    "rows_per_sec": 0.0,
+                }
+
+    try:
+        # Every column is read as text: dtypes inferred per chunk would create
+        # the raw table from the first chunk's types (e.g. TotalCharges as
+        # REAL) and later chunks with blanks would mix text into it. Numbers
+        # are converted once, in process_dataframe.
+        with pd.read_csv(source, chunksize=chunksize, dtype=str) as reader:
+            for chunk in reader:
+                if dedupe:
+                    digest = chunk_digest(chunk)
+                    if is_ingested(db_engine, digest, tablename):
+                        skipped += 1
+                        continue
+                rejected = None
+                if validator is not None:
+                    chunk, rejected = validator.validate(chunk)
+                    validation_seconds.append(validator.timings[-1]["seconds"])
+                chunk = chunk.assign(date=formatted_date)
+                db_engine.execute("BEGIN IMMEDIATE")
+                try:
+                    bulk_insert(db_engine, tablename, chunk)
+                    rejected_rows += quarantine_rows(
+                        db_engine, tablename, rejected, source_name
+                    )
+                    if dedupe:
+                        record_ingested(
+                            db_engine, digest, tablename, "chunk", source_name, len(chunk)
+                        )
+                    db_engine.commit()
+                except Exception:
+                    db_engine.rollback()
+                    raise
+                rows += len(chunk)
+                chunks += 1
+                if progress:
+                    progress(rows, chunks)
+                logger.debug(f"Wrote chunk {chunks} ({len(chunk)} rows) to {tablename}")
+        if file_hash:
+            record_ingested(db_engine, file_hash, tablename, "file", source_name, rows)
+            db_engine.commit()
+    except Exception as e:
+        logger.error(
+            f"Error streaming data to {tablename} after {rows} rows: {str(e)}"
+        )
+        raise
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "rows": rows,
+        "chunks": chunks,
+        "skipped_chunks": skipped,
+        "skipped_file": False,
+        "rejected_rows": rejected_rows,
+        "validation_seconds": validation_seconds,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else float(rows),
+    }
+    logger.info(
+        f"Ingested {rows} rows into {tablename} in {chunks} chunks, skipped "
+        f"{skipped} duplicate chunks, quarantined {rejected_rows} rows "
+        f"({stats['rows_per_sec']} rows/sec)"
+    )
+    return stats
+
+
+def is_supported_upload(filename: str) -> bool:
+    """Return True for the upload formats :func:`push_upload_to_db` accepts."""
+    return filename.lower().endswith(UPLOAD_SUFFIXES)
+
+
+def upload_suffix(filename: str) -> str:
+    """Return the supported suffix of ``filename`` (e.g. ``.csv.gz``)."""
+    return next(s for s in UPLOAD_SUFFIXES if filename.lower().endswith(s))
+
+
+def iter_csv_streams(path: str):
+    """Yield ``(name, stream)`` for every CSV in a ``.csv.gz`` or ``.zip`` file.
+
+    Members are decompressed lazily as they are read, so neither the archive
+    contents nor any decompressed copy ever lands in memory or on disk.
+    """
+    if path.lower().endswith(".gz"):
+        with gzip.open(path, "rb") as stream:
+            yield os.path.basename(path)[: -len(".gz")], stream
+        return
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.infolist():
+            base = os.path.basename(member.filename)
+            if member.is_dir() or base.startswith(".") or not base.endswith(".csv"):
+                continue
+            with archive.open(member) as stream:
+                yield member.filename, stream
+
+
+def push_upload_to_db(
+    db_engine,
+    tablename: str,
+    path: str,
+    chunksize: int = 50000,
+    progress=None,
+    dedupe: bool = False,
+    validator=None,
+) -> dict:
+    """Stream an uploaded ``.csv``, ``.csv.gz`` or ``.zip`` file into a table.
+
+    Compressed files are decompressed on the fly into
+    :func:`push_csv_chunks_to_db`, one CSV member after the other. Returns
+    the combined statistics of all members.
+    """
+    if not path.lower().endswith((".gz", ".zip")):
+        stats = push_csv_chunks_to_db(
+            db_engine,
+            tablename,
+            path,
+            chunksize,
+            progress=progress,
+            dedupe=dedupe,
+            validator=validator,
+        )
+        return {**stats, "files": 1}
+
+    start = time.perf_counter()
+    totals = {
+        "rows": 0,
+        "chunks": 0,
+        "skipped_chunks": 0,
+        "rejected_rows": 0,
+        "files": 0,
+        "validation_seconds": [],
+    }
+    archive_hash = None
+    if dedupe:
+        ensure_manifest(db_engine)
+        archive_hash = file_digest(path)
+        if is_ingested(db_engine, archive_hash, tablename):
+            logger.info(f"Skipping {path}: already ingested into {tablename}")
+            return {**totals, "skipped_file": True, "seconds": 0.0, "rows_per_sec": 0.0}
+
+    def member_progress(rows, chunks):
+        progress(totals["rows"] + rows, totals["chunks"] + chunks)
+
+    for name, stream in iter_csv_streams(path):
+        stats = push_csv_chunks_to_db(
+            db_engine,
+            tablename,
+            stream,
+            chunksize,
+            progress=member_progress if progress else None,
+            dedupe=dedupe,
+            name=name,
+            validator=validator,
+        )
+        for key in ("rows", "chunks", "skipped_chunks", "rejected_rows"):
+            totals[key] += stats[key]
+        totals["validation_seconds"].extend(stats["validation_seconds"])
+        totals["files"] += 1
+
+    if archive_hash:
+        record_ingested(
+            db_engine, archive_hash, tablename, "file", path, totals["rows"]
+        )
+        db_engine.commit()
+
+    elapsed = time.perf_counter() - start
+    rows = totals["rows"]
+    return {
+        **totals,
+        "skipped_file": False,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else float(rows),
+    }
+
+
 # @task(name="Pull data from database")
 def pull_data_from_db(db_engine, tablename: str) -> Optional[pd.DataFrame]:
     """Retrieve all data from a database table."""
     try:
-        query = f"SELECT * FROM {tablename}"
-        return pd.read_sql(query, db_engine)
+        return read_table(db_engine, tablename)
     except Exception as e:
         print(f"Error pulling data from database: {str(e)}")
         return None
 
 
+def iter_table_rows(
+    db_engine,
+    tablename: str,
+    columns: list,
+    after_rowid: int = 0,
+    limit: int = None,
+    batch_size: int = 1000,
+):
+    """Yield ``(rowid, record)`` pairs of ``tablename`` in rowid order.
+
+    Rows are fetched from the cursor ``batch_size`` at a time, so memory use
+    does not depend on the size of the table. ``columns`` must already be
+    validated against :func:`table_columns`.
+    """
+    projection = ", ".join(quote_identifier(col) for col in columns)
+    query = (
+        f"SELECT rowid, {projection} FROM {quote_identifier(tablename)} "
+        "WHERE rowid > ? ORDER BY rowid"
+    )
+    params = [after_rowid]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    cursor = db_engine.execute(query, params)
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                yield row[0], dict(zip(columns, row[1:]))
+    finally:
+        cursor.close()
+
+
+def get_watermark(db_engine, source: str) -> int:
+    """Return the last processed rowid of ``source`` (0 if never processed)."""
+    db_engine.execute(
+        f"CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} "
+        "(source TEXT PRIMARY KEY, last_rowid INTEGER NOT NULL, updated_at TEXT)"
+    )
+    row = db_engine.execute(
+        f"SELECT last_rowid FROM {WATERMARK_TABLE} WHERE source = ?", (source,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def pull_new_rows(db_engine, tablename: str, after_rowid: int):
+    """Retrieve the rows of ``tablename`` added after ``after_rowid``.
+
+    Returns the rows together with the highest rowid among them, which becomes
+    the new watermark once they have been processed.
+    """
+    query = (
+        f"SELECT rowid AS __rowid__, * FROM {quote_identifier(tablename)} "
+        "WHERE rowid > ? ORDER BY rowid"
+    )
+    data = read_sql(db_engine, query, params=(after_rowid,))
+    if data.empty:
+        return data.drop(columns="__rowid__"), after_rowid
+    return data.drop(columns="__rowid__"), int(data["__rowid__"].iloc[-1])
+
+
+def push_data_with_watermark(
+    db_engine,
+    tablename: str,
+    data: pd.DataFrame,
+    source: str,
+    last_rowid: int,
+    upsert_on: list = None,
+) -> None:
+    """Write processed rows and advance the watermark of ``source`` atomically.
+
+    Both writes share one transaction, so a failure never leaves rows that
+    would be processed a second time or a watermark pointing past lost rows.
+    """
+    data["date"] = datetime.now().strftime("%Y-%m-%d")
+    db_engine.execute("BEGIN IMMEDIATE")
+    try:
+        bulk_insert(db_engine, tablename, data, upsert_on=upsert_on)
+        db_engine.execute(
+            f"INSERT INTO {WATERMARK_TABLE} (source, last_rowid, updated_at) "
+            "VALUES (?, ?, ?) ON CONFLICT(source) DO UPDATE SET "
+            "last_rowid = excluded.last_rowid, updated_at = excluded.updated_at",
+            (source, last_rowid, datetime.now().isoformat(timespec="seconds")),
+        )
+        db_engine.commit()
+    except Exception as e:
+        db_engine.rollback()
+        logger.error(f"Error pushing processed rows to {tablename}: {str(e)}")
+        raise
+
+
 def load_dataframe(filepath: str) -> pd.DataFrame:
     """Load data from CSV file into a DataFrame."""
     try:
@@ -64,40 +465,89 @@ def load_dataframe(filepath: str) -> pd.DataFrame:
         raise
 
 
+def normalize_categories(series: pd.Series) -> pd.Series:
+    """Replace spaces with underscores and lowercase an object column.
+
+    The string operations run once per distinct value rather than once per
+    row; the normalized values are then gathered back by category code.
+    Missing and non-string values become NaN, as with the ``.str`` accessor.
+    """
+    codes, uniques = pd.factorize(series)
+    normalized = pd.Series(uniques, dtype=object).str.replace(" ", "_").str.lower()
+    # Missing values have code -1, which picks the trailing NaN
+    lookup = np.append(normalized.to_numpy(dtype=object), np.nan)
+    return pd.Series(lookup[codes], index=series.index, name=series.name)
+
+
+def numeric_column(series: pd.Series) -> Optional[pd.Series]:
+    """``series`` as numbers if every present value is numeric, else None.
+
+    Raw columns ingested in chunks are text; like ``normalize_categories``
+    the parse runs once per distinct value.
+    """
+    codes, uniques = pd.factorize(series)
+    numeric = pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce")
+    if len(uniques) == 0 or numeric.isna().any():
+        return None
+    if (codes < 0).any():
+        numeric = numeric.astype("float64")
+        lookup = np.append(numeric.to_numpy(), np.nan)
+        return pd.Series(lookup[codes], index=series.index, name=series.name)
+    return pd.Series(
+        numeric.to_numpy()[codes], index=series.index, name=series.name
+    )
+
+
 # @task(name="Process raw data")
 def process_dataframe(
     dataframe: pd.DataFrame, target_col: str, drop_cols: list = None
 ) -> pd.DataFrame:
-    """Clean and preprocess the dataframe for analysis."""
-    try:
-        df = dataframe.copy()
+    """Clean and preprocess the dataframe for analysis.
 
+    Columns are handled one at a time and assembled into a new frame without
+    copying the input; rows are only copied when malformed ``totalcharges``
+    values have to be filtered out.
+    """
+    try:
         # Standardize column names
-        df.columns = df.columns.str.replace(" ", "_").str.lower()
+        names = dataframe.columns.str.replace(" ", "_").str.lower()
         target_col = target_col.lower()
 
-        # Normalize categorical columns
-        categorical_cols = df.select_dtypes(include=["object"]).columns
-        for col in categorical_cols:
-            df[col] = df[col].str.replace(" ", "_").str.lower()
-
         # Drop specified columns
-        if drop_cols:
-            drop_cols = [col.lower() for col in drop_cols]
-            df = df.drop(drop_cols, axis=1)
+        drop_cols = {col.lower() for col in drop_cols or []}
+        missing = drop_cols.difference(names)
+        if missing:
+            raise KeyError(f"{sorted(missing)} not found in axis")
+
+        columns = {}
+        for position, name in enumerate(names):
+            if name in drop_cols:
+                continue
+            column = dataframe.iloc[:, position]
+            # Parse numeric text and normalize categorical columns
+            if column.dtype == object and name != "totalcharges":
+                numeric = numeric_column(column)
+                column = normalize_categories(column) if numeric is None else numeric
+            columns[name] = column
 
-        # Convert totalcharges to float
-        if "totalcharges" in df.columns:
-            df = df[df["totalcharges"] != "_"]
-            df["totalcharges"] = df["totalcharges"].astype("float64")
+        # Drop rows with a blank (non-numeric) totalcharges; the column may
+        # mix floats and text when it was written by older chunked ingests
+        if "totalcharges" in columns:
+            charges = pd.to_numeric(columns["totalcharges"], errors="coerce")
+            valid = charges.notna() | columns["totalcharges"].isna()
+            if not valid.all():
+                columns = {name: column[valid] for name, column in columns.items()}
+                charges = charges[valid]
+            columns["totalcharges"] = charges.astype("float64")
 
         # Convert target column to binary
-        if target_col in df.columns:
-            df["churn"] = (df[target_col] == "yes").astype(int)
+        if target_col in columns:
+            target = (columns[target_col] == "yes").astype(int)
             if target_col != "churn":
-                df = df.drop(columns=[target_col])
+                del columns[target_col]
+            columns["churn"] = target
 
-        return df
+        return pd.DataFrame(columns, copy=False)
 
     except Exception as e:
         print(f"Error processing dataframe: {str(e)}")
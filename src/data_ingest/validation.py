@@ -0,0 +1,175 @@
+import time
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_TABLE = "ingest_quarantine"
+
+# Registered checks: name -> func(series, argument) returning a boolean mask
+# that is True for the rows that pass. Every check runs on a whole column at
+# once; nulls pass every check except ``not_null``.
+CHECKS = {}
+
+
+def register_check(name: str):
+    """Register a column check under ``name`` so rules in config can use it."""
+
+    def decorator(func):
+        CHECKS[name] = func
+        return func
+
+    return decorator
+
+
+def is_null(series: pd.Series) -> pd.Series:
+    """Mask of missing values, counting blank strings as missing."""
+    null = series.isna()
+    if series.dtype == object:
+        null |= series.astype(str).str.strip() == ""
+    return null
+
+
+def as_numeric(series: pd.Series) -> pd.Series:
+    if series.dtype.kind in "iufb":
+        return series
+    return pd.to_numeric(series.where(~is_null(series)), errors="coerce")
+
+
+@register_check("not_null")
+def check_not_null(series: pd.Series, required) -> pd.Series:
+    return ~is_null(series) if required else pd.Series(True, index=series.index)
+
+
+@register_check("type")
+def check_type(series: pd.Series, expected: str) -> pd.Series:
+    if expected in ("str", "string", "category"):
+        return pd.Series(True, index=series.index)
+    numeric = as_numeric(series)
+    valid = numeric.notna()
+    if expected == "int":
+        valid &= np.isclose(numeric.fillna(0) % 1, 0)
+    elif expected != "float":
+        raise ValueError(f"Unknown type in validation rules: {expected}")
+    return valid | is_null(series)
+
+
+@register_check("min")
+def check_min(series: pd.Series, minimum) -> pd.Series:
+    return ~(as_numeric(series) < minimum)
+
+
+@register_check("max")
+def check_max(series: pd.Series, maximum) -> pd.Series:
+    return ~(as_numeric(series) > maximum)
+
+
+@register_check("allowed")
+def check_allowed(series: pd.Series, values) -> pd.Series:
+    return series.isin(values) | is_null(series)
+
+
+class ChunkValidator:
+    """Validate chunks of raw rows against per-column rules.
+
+    ``rules`` maps column names to ``{check: argument}``, e.g.
+    ``{"tenure": {"type": "int", "min": 0}}``. Columns named in the rules
+    but missing from a chunk reject the whole chunk. Timings of every
+    validated chunk are kept in ``timings``.
+    """
+
+    def __init__(self, rules: dict, checks: dict = None):
+        self.rules = rules
+        self.checks = checks or CHECKS
+        self.timings = []
+        unknown = {
+            check
+            for spec in rules.values()
+            for check in spec
+            if check not in self.checks
+        }
+        if unknown:
+            raise ValueError(f"Unknown validation checks: {sorted(unknown)}")
+
+    def validate(self, chunk: pd.DataFrame):
+        """Split ``chunk`` into ``(valid_rows, rejected_rows)``.
+
+        Rejected rows carry a ``rejection_reason`` column listing the failed
+        ``column:check`` pairs.
+        """
+        start = time.perf_counter()
+        failures = []
+        for column, spec in self.rules.items():
+            if column not in chunk.columns:
+                failures.append((f"{column}:missing", np.ones(len(chunk), bool)))
+                continue
+            for check, argument in spec.items():
+                passed = self.checks[check](chunk[column], argument)
+                failures.append((f"{column}:{check}", ~np.asarray(passed, bool)))
+
+        rejected = np.zeros(len(chunk), bool)
+        for _, failed in failures:
+            rejected |= failed
+
+        bad = chunk[rejected].copy()
+        if len(bad):
+            reasons = pd.Series("", index=bad.index)
+            for label, failed in failures:
+                failed = failed[rejected]
+                if failed.any():
+                    reasons[failed] += label + ";"
+            bad["rejection_reason"] = reasons.str.rstrip(";")
+        good = chunk[~rejected] if len(bad) else chunk
+
+        self.timings.append(
+            {
+                "rows": len(chunk),
+                "rejected": len(bad),
+                "seconds": round(time.perf_counter() - start, 6),
+            }
+        )
+        return good, bad
+
+    def summary(self) -> dict:
+        return {
+            "rejected_rows": sum(t["rejected"] for t in self.timings),
+            "seconds": round(sum(t["seconds"] for t in self.timings), 6),
+            "chunks": list(self.timings),
+        }
+
+
+def build_validator(config: dict):
+    """Build a :class:`ChunkValidator` from the ``validation`` config section.
+
+    Returns None when validation is not configured or disabled.
+    """
+    if not config or not config.get("enabled", True) or not config.get("columns"):
+        return None
+    return ChunkValidator(config["columns"])
+
+
+def quarantine_frame(
+    rejected: pd.DataFrame, tablename: str, source: str = None
+) -> pd.DataFrame:
+    """Prepare rows rejected for ``tablename`` for the quarantine table.
+
+    Each row is kept as JSON exactly as received, so one quarantine table
+    holds rows of any input schema, including values that would not fit the
+    target column types.
+    """
+    records = (
+        rejected.drop(columns="rejection_reason")
+        .to_json(orient="records", lines=True, date_format="iso")
+        .splitlines()
+    )
+    return pd.DataFrame(
+        {
+            "tablename": tablename,
+            "source": source,
+            "row": records,
+            "rejection_reason": rejected["rejection_reason"].to_numpy(),
+            "quarantined_at": datetime.now().isoformat(timespec="seconds"),
+        }
+    )
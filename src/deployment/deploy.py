@@ -1,5 +1,4 @@
 import os
-import yaml
 import shutil
 import logging
 import pandas as pd
@@ -14,9 +13,14 @@ from utils import (
     output_data_processing,
     load_model,
     push_data_to_db,
-    connect_sqlite,
 )
 from io import StringIO
+from common.db import get_connection, release_connections
+from common.config import load_yaml_config
+from common.columnar import load_processed_data
+from common.schema import load_schema
+from common.migrations import migrate
+from common.encoders import encoder_input
 
 # Set up logging
 logging.basicConfig(
@@ -28,6 +32,8 @@ logger = logging.getLogger(__name__)
 def create_app(config=None):
     """Factory function to create and configure the Flask app"""
     app = Flask("Deploy")
+    # Return pooled database connections at the end of every request
+    app.teardown_appcontext(release_connections)
 
     # If config is not provided, load it
     if config is None:
@@ -35,6 +41,11 @@ def create_app(config=None):
 
     # Store config in app for access in routes
     app.config["deploy_config"] = config
+    try:
+        migrate(get_db_engine(config))
+    except Exception as e:
+        logger.warning(f"Skipping database migrations: {str(e)}")
+    release_connections()
 
     # Register routes
     register_routes(app)
@@ -48,10 +59,7 @@ def load_config():
     config_path = os.getenv("config_path", "./configs/deploy.yaml")
 
     try:
-        with open(config_path) as config_file:
-            config = yaml.safe_load(config_file)
-            validate_config(config)
-            return config
+        return load_yaml_config(config_path, validator=validate_config)
     except FileNotFoundError:
         logger.warning(f"Config file not found at {config_path}.")
 
@@ -73,9 +81,9 @@ def initialize_mlflow(config):
 
 
 def get_db_engine(config):
-    """Get database engine from configuration"""
+    """Get this thread's pooled database connection from configuration"""
     customer_db = config["database"]["db_path"]
-    return connect_sqlite(customer_db)
+    return get_connection(customer_db)
 
 
 def extract_top_model(client):
@@ -95,6 +103,9 @@ def extract_top_model(client):
         )
 
         for run in runs:
+            # Incremental updates are scored on a small holdout only
+            if run.data.tags.get("training_mode") == "incremental":
+                continue
             try:
                 metrics = run.data.metrics
                 inference_time = (run.info.end_time - run.info.start_time) / 1000
@@ -222,8 +233,8 @@ def compare_models(production_model, challenger_model, validation_data):
     X_val, y_val = validation_data
 
     # Get predictions from both models
-    prod_preds = production_model.predict(X_val)
-    chal_preds = challenger_model.predict(X_val)
+    prod_preds = production_model.predict(encoder_input(production_model, X_val))
+    chal_preds = challenger_model.predict(encoder_input(challenger_model, X_val))
 
     # Calculate metrics
     from sklearn.metrics import f1_score, roc_auc_score
@@ -249,15 +260,30 @@ def compare_models(production_model, challenger_model, validation_data):
         return False, metrics
 
 
-def load_validation_data(db_engine, tablename):
-    """Load validation data from database"""
-    df = pull_data_from_db(db_engine, tablename)
+def load_validation_data(db_engine, tablename, columnar=None):
+    """Load validation data from database
+
+    ``columnar`` is the optional ``columnar`` config section; when it names a
+    Parquet store only its columns and date range are loaded from there.
+    """
+    dtypes = load_schema(db_engine, tablename)
+    if columnar and columnar.get("path"):
+        df = load_processed_data(
+            db_engine,
+            tablename,
+            columns=columnar.get("columns"),
+            start_date=columnar.get("start_date"),
+            end_date=columnar.get("end_date"),
+            columnar_path=columnar["path"],
+            dtypes=dtypes,
+        )
+    else:
+        df = pull_data_from_db(db_engine, tablename, dtypes=dtypes)
 
     if "date" in df.columns:
         df.drop(["date"], axis=1, inplace=True)
 
     y_val, x_val = df.pop("churn"), df
-    x_val = x_val.to_dict(orient="records")
     # y_val = y_val.map({"yes": 1, "no": 0}).astype(int)
 
     return (x_val, y_val)
@@ -281,7 +307,9 @@ def automated_deployment_workflow(config):
 
         # 3. Load validation data
         db_engine = get_db_engine(config)
-        val_data = load_validation_data(db_engine, "processdata")
+        val_data = load_validation_data(
+            db_engine, "processdata", columnar=config.get("columnar")
+        )
 
         # 4. Compare with production model if exists
         try:
@@ -339,11 +367,13 @@ def register_routes(app):
         db_engine = get_db_engine(config)
 
         model = load_model(model_name)
-        data = pull_data_from_db(db_engine, "processdata")
+        data = pull_data_from_db(
+            db_engine, "processdata", dtypes=load_schema(db_engine, "processdata")
+        )
 
         if len(data):
-            churn, data_dict, dataframe = input_data_processing(data)
-            prediction = model.predict(data_dict)
+            churn, features, dataframe = input_data_processing(data)
+            prediction = model.predict(encoder_input(model, features))
 
             output_frame = output_data_processing(dataframe, prediction, churn)
             prediction_table_name = config["logs"]["prediction_logs"]
@@ -378,9 +408,9 @@ def register_routes(app):
             df = pd.read_csv(csv_buffer)
 
             # Now process the DataFrame
-            churn, data_dict, dataframe = input_data_processing(df)
+            churn, features, dataframe = input_data_processing(df)
 
-            prediction = model.predict(data_dict)
+            prediction = model.predict(encoder_input(model, features))
 
             output_frame = output_data_processing(dataframe, prediction, churn)
             prediction_table_name = config["logs"]["prediction_logs"]
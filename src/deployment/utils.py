@@ -1,25 +1,17 @@
 import mlflow
-import sqlite3
 import pandas as pd
 from datetime import datetime
-
-
-def connect_sqlite(dbpath: str) -> sqlite3.Connection:
-    """Create and return a SQLite connection."""
-    try:
-        return sqlite3.connect(dbpath, check_same_thread=False)
-    except Exception as e:
-        print(dbpath)
-        print(f"Error connecting to SQLite: {str(e)}")
-        raise
+from common.db import read_table
+from common.sqlite_writer import bulk_insert
 
 
 # @task(name="Pull data from database")
-def pull_data_from_db(db_engine, tablename: str):
-    """Retrieve all data from a database table."""
+def pull_data_from_db(
+    db_engine, tablename: str, columns: list = None, dtypes: dict = None
+):
+    """Retrieve all data (or the given columns) from a database table."""
     try:
-        query = f"SELECT * FROM {tablename}"
-        return pd.read_sql(query, db_engine)
+        return read_table(db_engine, tablename, columns=columns, dtypes=dtypes)
     except Exception as e:
         print(f"Error pulling data from database: {str(e)}")
         return None
@@ -41,12 +33,17 @@ def input_data_processing(data, column_to_drop="churn"):
 
     churn = data.pop("churn")
 
-    categorical_col = data.dtypes[data.dtypes == "object"].index.tolist()
+    categorical_col = data.select_dtypes(
+        include=["object", "category"]
+    ).columns.tolist()
     for col in categorical_col:
         data[col] = data[col].str.replace(" ", "_").str.lower()
-    data_dict = data.to_dict(orient="records")
 
-    return churn, data_dict, data
+    # Model features: every column except the id, kept as a DataFrame; see
+    # common.encoders.encoder_input for models that still expect dicts
+    features = data.drop(columns=["customerid"], errors="ignore")
+
+    return churn, features, data
 
 
 def output_data_processing(data, prediction, churn, model_name="Production"):
@@ -90,6 +87,6 @@ def push_data_to_db(db_engine, tablename: str, data: pd.DataFrame):
             raise ValueError("Data must be provided")
 
         data["prediction_date"] = formatted_date
-        data.to_sql(tablename, db_engine, if_exists="append", index=False)
+        bulk_insert(db_engine, tablename, data)
     except Exception as e:
         print(f"Error pushing data to database: {str(e)}")
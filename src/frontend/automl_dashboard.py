@@ -2,6 +2,9 @@ import streamlit as st
 import requests
 import pandas as pd
 import json
+import gzip
+import time
+import zipfile
 from io import StringIO
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -11,6 +14,7 @@ st.set_page_config(page_title="AutoML Dashboard", page_icon="🤖", layout="wide
 
 # Flask backend URL
 FLASK_URL = "http://localhost:8000"  # Change this to match your Flask server
+TRAIN_URL = "http://127.0.0.1:8001/train"
 
 # Session state to track progress
 if "current_step" not in st.session_state:
@@ -35,6 +39,8 @@ if "target_column" not in st.session_state:
     st.session_state.target_column = None
 if "job_id" not in st.session_state:
     st.session_state.job_id = None
+if "training_job_id" not in st.session_state:
+    st.session_state.training_job_id = None
 
 # Helper function to make API calls
 def make_api_call(endpoint, method="GET", data=None, files=None):
@@ -49,7 +55,7 @@ def make_api_call(endpoint, method="GET", data=None, files=None):
             else:
                 response = requests.post(url, json=data)
 
-        if response.status_code in [200, 201]:
+        if response.status_code in [200, 201, 202]:
             return response.json(), None
         else:
             return None, f"Error: {response.status_code} - {response.text}"
@@ -57,6 +63,42 @@ def make_api_call(endpoint, method="GET", data=None, files=None):
         return None, f"Exception: {str(e)}"
 
 
+# Poll a background job until it finishes; on_status sees every poll
+def wait_for_job(job_id, timeout=600, interval=1.0, base_url=FLASK_URL, on_status=None):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, error = make_api_call(f"{base_url}/jobs/{job_id}")
+        if error:
+            return None, error
+        if on_status:
+            on_status(status)
+        if status["status"] == "succeeded":
+            return status, None
+        if status["status"] in ("failed", "cancelled"):
+            return None, f"Job {job_id} {status['status']}: {status['error']}"
+        time.sleep(interval)
+    return None, f"Job {job_id} did not finish within {timeout} seconds"
+
+
+def read_upload(uploaded_file):
+    """Read an uploaded .csv, .csv.gz or .zip (first CSV member) for preview."""
+    name = uploaded_file.name.lower()
+    if name.endswith(".zip"):
+        with zipfile.ZipFile(uploaded_file) as archive:
+            member = next(n for n in archive.namelist() if n.endswith(".csv"))
+            with archive.open(member) as stream:
+                return pd.read_csv(stream)
+    return pd.read_csv(uploaded_file, compression="gzip" if name.endswith(".gz") else None)
+
+
+def upload_payload(uploaded_file):
+    """Return the (filename, bytes) to send; plain CSVs are gzipped first."""
+    uploaded_file.seek(0)
+    if uploaded_file.name.lower().endswith(".csv"):
+        return f"{uploaded_file.name}.gz", gzip.compress(uploaded_file.getvalue())
+    return uploaded_file.name, uploaded_file.getvalue()
+
+
 # Main title
 st.title("🤖 AutoML System Dashboard")
 st.subheader("Automated Machine Learning Pipeline")
@@ -90,12 +132,14 @@ if selected_page == "1. Data Ingestion":
     st.header("Data Ingestion")
 
     # File upload
-    uploaded_file = st.file_uploader("Upload your dataset (CSV)", type=["csv"])
+    uploaded_file = st.file_uploader(
+        "Upload your dataset (CSV, .csv.gz or .zip)", type=["csv", "gz", "zip"]
+    )
 
     if uploaded_file is not None:
         # Preview the data
         try:
-            df = pd.read_csv(uploaded_file)
+            df = read_upload(uploaded_file)
             st.session_state.uploaded_file_data = uploaded_file
             st.session_state.dataset_preview = df.head(5)
             st.write("Data Preview:")
@@ -108,22 +152,24 @@ if selected_page == "1. Data Ingestion":
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("Upload Dataset"):
-                    # Reset the file position to the beginning
-                    uploaded_file.seek(0)
-
-                    # Send to Flask backend
-                    files = {"file": uploaded_file}
+                    # Send to Flask backend, compressed
+                    files = {"file": upload_payload(uploaded_file)}
                     response, error = make_api_call(
                         f"{FLASK_URL}/upload", method="POST", files=files
                     )
 
+                    if not error:
+                        st.session_state.job_id = response.get("job_id", "unknown")
+                        with st.spinner("Ingesting data..."):
+                            job, error = wait_for_job(st.session_state.job_id)
+
                     if error:
                         st.error(error)
                     else:
                         st.session_state.dataset_uploaded = True
-                        st.session_state.job_id = response.get("job_id", "unknown")
                         st.success(
-                            f"Dataset uploaded successfully! Job ID: {st.session_state.job_id}"
+                            f"Dataset uploaded successfully! Job ID: {st.session_state.job_id} "
+                            f"({job['progress'].get('rows_processed', 0)} rows)"
                         )
 
                         # Get target column options
@@ -201,6 +247,8 @@ elif selected_page == "2. Data Processing":
                     method="POST",
                     data=processing_params,
                 )
+                if not error:
+                    _, error = wait_for_job(response["job_id"])
 
                 if error:
                     st.error(error)
@@ -256,6 +304,18 @@ elif selected_page == "3. Model Training":
                 default=["random_forest", "xgboost"],
             )
 
+        # Clicking cancel re-runs the page, which stops polling the old job
+        if st.session_state.training_job_id and st.button(
+            "Cancel Training", key="cancel_training"
+        ):
+            job_id = st.session_state.training_job_id
+            _, error = make_api_call(f"{TRAIN_URL}/jobs/{job_id}/cancel", method="POST")
+            st.session_state.training_job_id = None
+            if error:
+                st.error(error)
+            else:
+                st.info("Training cancelled; it stops after the current trial.")
+
         # Train button
         if st.button("Train Models"):
             # Prepare training parameters
@@ -264,15 +324,39 @@ elif selected_page == "3. Model Training":
                 "problem_type": problem_type,
                 "models": models_to_try,
             }
-            # Call training endpoint
+            # Queue a training job and follow its per-trial progress
             with st.spinner("Training models... This may take a few minutes"):
+                progress_bar = st.progress(0.0, text="Waiting for training to start")
+
+                def show_progress(status):
+                    progress = status["progress"]
+                    if progress.get("total"):
+                        eta = status["eta_seconds"]
+                        progress_bar.progress(
+                            min(progress.get("completed", 0) / progress["total"], 1.0),
+                            text=f"{progress.get('completed', 0)}/{progress['total']} trials"
+                            + (f", about {eta:.0f}s left" if eta is not None else ""),
+                        )
+
                 response, error = make_api_call(
-                    "http://127.0.0.1:8001/train"
-                )  # data=training_params)
+                    TRAIN_URL, method="POST", data=training_params
+                )
+                if not error:
+                    st.session_state.training_job_id = response["job_id"]
+                    st.button("Cancel Training", key="cancel_training")
+                    status, error = wait_for_job(
+                        response["job_id"],
+                        timeout=3 * 3600,
+                        interval=2.0,
+                        base_url=TRAIN_URL,
+                        on_status=show_progress,
+                    )
+                    st.session_state.training_job_id = None
 
                 if error:
                     st.error(error)
                 else:
+                    response = status["result"] or {}
                     st.session_state.model_trained = True
                     st.session_state.training_metrics = response.get("metrics", {})
                     st.session_state.feature_importance = response.get(
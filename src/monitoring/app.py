@@ -1,7 +1,5 @@
 # # monitoring_service.py
 import os
-import yaml
-import sqlite3
 import pandas as pd
 from typing import Dict, Any, Optional
 from flask import Flask, request, jsonify
@@ -16,9 +14,17 @@ from evidently.metric_preset import (
 from evidently.metrics import ColumnDriftMetric, DatasetDriftMetric
 from prometheus_client import Gauge, make_wsgi_app
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from common.db import get_connection, read_sql, release_connections, table_columns
+from common.config import load_yaml_config
+from common.sqlite_writer import bulk_insert
+from common.columnar import load_processed_data
+from common.schema import load_schema
+from common.migrations import migrate
 
 # Initialize Flask app
 app = Flask(__name__)
+# Return pooled database connections at the end of every request
+app.teardown_appcontext(release_connections)
 
 # Define Prometheus metrics
 data_drift_gauge = Gauge("data_drift", "Data Drift Status", ["model"])
@@ -37,46 +43,96 @@ app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {"/metrics": make_wsgi_app()})
 
 # Load configuration
 config_path = os.getenv("config_path", "config.yaml")
-with open(config_path) as config_file:
-    config = yaml.safe_load(config_file)
+config = load_yaml_config(config_path)
 
-# Database connection
-def connect_sqlite(dbpath: str) -> sqlite3.Connection:
-    """Create and return a SQLite connection."""
+# Database connection (one pooled connection per request thread)
+customerdb = config["database"]
+
+
+def get_db_engine():
+    return get_connection(customerdb)
+
+
+columnar = config.get("columnar") or {}
+
+
+def fetch_data_from_db(
+    tablename: str,
+    columns: list = None,
+    start_date: str = None,
+    end_date: str = None,
+) -> Optional[pd.DataFrame]:
+    """Retrieve the requested columns and date range of a database table.
+
+    The processed data table is read from the Parquet store when one is
+    configured.
+    """
     try:
-        return sqlite3.connect(dbpath, check_same_thread=False)
+        db_engine = get_db_engine()
+        columnar_path = None
+        if tablename == columnar.get("table"):
+            columnar_path = columnar.get("path")
+        return load_processed_data(
+            db_engine,
+            tablename,
+            columns=columns,
+            start_date=start_date,
+            end_date=end_date,
+            columnar_path=columnar_path,
+            dtypes=load_schema(db_engine, tablename),
+        )
     except Exception as e:
-        print(f"Error connecting to SQLite: {str(e)}")
-        raise
-
+        print(f"Error pulling data from database: {str(e)}")
+        return None
 
-# Initialize DB connection
-customerdb = config["database"]
-db_engine = connect_sqlite(customerdb)
 
+def fetch_prediction_logs(model_name: str) -> Optional[pd.DataFrame]:
+    """Retrieve the prediction logs of one model.
 
-def fetch_data_from_db(tablename: str) -> Optional[pd.DataFrame]:
-    """Retrieve all data from a database table."""
+    The model filter runs in SQL (on the indexed ``model`` column). Rows keep
+    their position in the whole table as index, as when the full table was
+    read and filtered in pandas.
+    """
     try:
-        query = f"SELECT * FROM {tablename}"
-        return pd.read_sql(query, db_engine)
+        db_engine = get_db_engine()
+        query = "SELECT rowid - 1 AS row_index, * FROM prediction_logs"
+        params = None
+        if "model" in table_columns(db_engine, "prediction_logs"):
+            query += " WHERE model = ?"
+            params = [model_name]
+        logs = read_sql(db_engine, query, params=params)
+        return logs.set_index("row_index").rename_axis(None)
     except Exception as e:
         print(f"Error pulling data from database: {str(e)}")
         return None
 
 
+def attach_predictions(
+    feature_logs: pd.DataFrame, prediction_logs: pd.DataFrame
+) -> pd.DataFrame:
+    """Add each customer's latest logged label and prediction to its features.
+
+    Rows are matched on ``customerid``, not by position: a date window
+    leaves fewer feature rows than log rows. Customers without a logged
+    prediction are dropped.
+    """
+    latest = prediction_logs.drop_duplicates("customerid", keep="last")
+    return feature_logs.merge(
+        latest[["customerid", "actual", "predicted"]], on="customerid", how="inner"
+    )
+
+
 def get_reference_data(model_name: str) -> pd.DataFrame:
     """Get reference data for a specific model from DB."""
-    prediction_logs = fetch_data_from_db("prediction_logs")
-    feature_logs = fetch_data_from_db("processdata")
-
-    # Filter for specific model if needed
-    if "model" in prediction_logs.columns:
-        prediction_logs = prediction_logs[prediction_logs["model"] == model_name]
+    prediction_logs = fetch_prediction_logs(model_name)
+    feature_logs = fetch_data_from_db(
+        "processdata",
+        start_date=columnar.get("start_date"),
+        end_date=columnar.get("end_date"),
+    )
 
     # Join feature and prediction data
-    feature_logs["actual"] = prediction_logs["actual"]
-    feature_logs["predicted"] = prediction_logs["predicted"]
+    feature_logs = attach_predictions(feature_logs, prediction_logs)
 
     # Use first 1000 records as reference
     reference_data = feature_logs.iloc[:1000]
@@ -86,16 +142,15 @@ def get_reference_data(model_name: str) -> pd.DataFrame:
 
 def get_current_data(model_name: str) -> pd.DataFrame:
     """Get current data for a specific model from DB."""
-    prediction_logs = fetch_data_from_db("prediction_logs")
-    feature_logs = fetch_data_from_db("processdata")
-
-    # Filter for specific model if needed
-    if "model" in prediction_logs.columns:
-        prediction_logs = prediction_logs[prediction_logs["model"] == model_name]
+    prediction_logs = fetch_prediction_logs(model_name)
+    feature_logs = fetch_data_from_db(
+        "processdata",
+        start_date=columnar.get("start_date"),
+        end_date=columnar.get("end_date"),
+    )
 
     # Join feature and prediction data
-    feature_logs["actual"] = prediction_logs["actual"]
-    feature_logs["predicted"] = prediction_logs["predicted"]
+    feature_logs = attach_predictions(feature_logs, prediction_logs)
 
     # Use last 1000 records as current data
     current_data = feature_logs.iloc[-1000:]
@@ -108,9 +163,11 @@ def analyze_drift(
 ):
     """Analyze drift between reference and current data and report to Prometheus."""
     categorical_cols = reference_data.select_dtypes(
-        include=["object"]
+        include=["object", "category"]
+    ).columns.to_list()
+    numerical_cols = reference_data.select_dtypes(
+        exclude=["object", "category"]
     ).columns.to_list()
-    numerical_cols = reference_data.select_dtypes(exclude=["object"]).columns.to_list()
 
     # Remove target and prediction columns from features
     if "actual" in numerical_cols:
@@ -188,11 +245,7 @@ def analyze_drift(
 
 def analyze_performance(model_name: str) -> Dict[str, Any]:
     """Analyze model performance metrics."""
-    prediction_logs = fetch_data_from_db("prediction_logs")
-
-    # Filter for specific model if needed
-    if "model" in prediction_logs.columns:
-        prediction_logs = prediction_logs[prediction_logs["model"] == model_name]
+    prediction_logs = fetch_prediction_logs(model_name)
 
     # Calculate performance metrics
     actual = prediction_logs["actual"]
@@ -241,9 +294,7 @@ def submit_metrics():
         # Store features in the database
         if "features" in data:
             features_df = pd.DataFrame([data["features"]])
-            features_df.to_sql(
-                "processdata", db_engine, if_exists="append", index=False
-            )
+            bulk_insert(get_db_engine(), "processdata", features_df)
 
         # Store predictions in the database
         if "prediction" in data and "actual" in data:
@@ -252,8 +303,8 @@ def submit_metrics():
                 "predicted": data["prediction"],
                 "actual": data["actual"],
             }
-            pd.DataFrame([prediction_data]).to_sql(
-                "prediction_logs", db_engine, if_exists="append", index=False
+            bulk_insert(
+                get_db_engine(), "prediction_logs", pd.DataFrame([prediction_data])
             )
 
             # Update performance metrics
@@ -291,4 +342,6 @@ def debug_metrics():
 
 
 if __name__ == "__main__":
+    migrate(get_db_engine())
+    release_connections()
     app.run(debug=False, host="0.0.0.0", port=8003)  # Start Flask app on port 8003
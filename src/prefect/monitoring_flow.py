@@ -1,7 +1,7 @@
 # src/prefect/flows/monitoring_flow.py
 from prefect import flow, task
 import requests
-import yaml
+from common.config import load_yaml_config
 import os
 import json
 import datetime
@@ -19,8 +19,7 @@ logger = logging.getLogger(__name__)
 
 # Load configuration
 config_path = os.getenv("config_path")
-with open(config_path, "r") as f:
-    config = yaml.safe_load(f)
+config = load_yaml_config(config_path)
 
 
 @task(description="starting monitoring")
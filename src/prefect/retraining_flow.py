@@ -1,7 +1,7 @@
 # src/prefect/flows/retraining_flow.py
 from prefect import flow, task
 import requests
-import yaml
+from common.config import load_yaml_config
 import pandas as pd
 import logging
 import time
@@ -13,8 +13,7 @@ logger = logging.getLogger(__name__)
 
 # Load configuration
 config_path = os.getenv("config_path")
-with open(config_path, "r") as f:
-    config = yaml.safe_load(f)
+config = load_yaml_config(config_path)
 
 
 @task(description="check model retrain")
@@ -63,14 +62,56 @@ def check_retraining_needed(model_name):
     return False
 
 
+TRAIN_URL = "http://train:8001"
+
+
+def wait_for_training_job(job_id, timeout, interval):
+    """Poll a job of the training service until it finishes; return its result"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = requests.get(f"{TRAIN_URL}/train/jobs/{job_id}", timeout=30).json()
+        if status["status"] == "succeeded":
+            return status["result"]
+        if status["status"] in ("failed", "cancelled"):
+            raise RuntimeError(
+                f"Training job {job_id} {status['status']}: {status['error']}"
+            )
+        progress = status["progress"]
+        logger.info(
+            f"Training job {job_id}: {progress.get('completed', 0)}/"
+            f"{progress.get('total', '?')} trials, ETA {status['eta_seconds']}s"
+        )
+        time.sleep(interval)
+    raise TimeoutError(f"Training job {job_id} still running after {timeout}s")
+
+
+@task(description="update model incrementally")
+def update_model(timeout=600, interval=5):
+    """Continue the Production model on the rows added since it was trained"""
+    try:
+        response = requests.post(f"{TRAIN_URL}/update", timeout=30)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        logger.info(f"Update job {job_id}: {response.json()['message']}")
+        result = wait_for_training_job(job_id, timeout, interval)
+        if not result.get("updated"):
+            logger.info(f"Incremental update skipped: {result.get('reason')}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error updating model: {str(e)}")
+        return {"updated": False, "reason": str(e)}
+
+
 @task(description="retrain model")
-def retrain_model():
-    """Retrain the model with new data"""
+def retrain_model(timeout=6 * 3600, interval=15):
+    """Queue a training job and poll it until it finishes"""
     try:
-        endpoint = "http://train:8001/train"
-        response = requests.get(endpoint)
-        print(response)
-        print(response.json())
+        response = requests.post(f"{TRAIN_URL}/train", timeout=30)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        logger.info(f"Training job {job_id}: {response.json()['message']}")
+        return wait_for_training_job(job_id, timeout, interval)
 
     except Exception as e:
         logger.error(f"Error retraining model: {str(e)}")
@@ -110,6 +151,16 @@ def retraining_flow():
 
         if retraining_needed:
 
+            # Try a quick incremental update of the Production model first
+            update_result = update_model()
+            if update_result.get("promoted"):
+                results[model_name] = {
+                    "retraining_performed": True,
+                    "incremental": True,
+                    "update_result": update_result,
+                }
+                continue
+
             # Retrain model
             retrain_model()
 
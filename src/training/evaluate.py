@@ -3,6 +3,7 @@ import json
 from prefect import task
 
 from dotenv import load_dotenv
+from common.encoders import encoder_input
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
 load_dotenv()
@@ -24,8 +25,7 @@ def evaluate(y_true, prediction):
 @task(name="Evaluate Model")
 def evaluate_model(model, X_test, y_test, float_precision=4):
 
-    X_test = X_test.to_dict(orient="records")
-    prediction = model.predict(X_test)
+    prediction = model.predict(encoder_input(model, X_test))
     evaluation_result = evaluate(y_test, prediction)
 
     evaluation_result = json.loads(
@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import joblib
+import pandas as pd
+from collections import OrderedDict
+from sklearn.model_selection import train_test_split
+from common.encoders import FrameEncoder
+
+logger = logging.getLogger(__name__)
+
+# Bump when the encoding below changes, so stale cache files are not reused
+FEATURES_VERSION = 2
+
+
+class FeatureSet:
+    """Encoded train/test matrices plus the fitted encoder that produced them.
+
+    Unpacks like the ``(train_x, test_x, train_y, test_y)`` tuple of
+    ``train_test_split``. Matrices are C-contiguous float32 arrays, the
+    layout the tree models work on internally. ``watermark`` is the highest
+    source rowid that was available when the rows were loaded.
+    """
+
+    def __init__(
+        self, train_x, test_x, train_y, test_y, encoder, key=None, watermark=None
+    ):
+        self.train_x = train_x
+        self.test_x = test_x
+        self.train_y = train_y
+        self.test_y = test_y
+        self.encoder = encoder
+        self.key = key
+        self.watermark = watermark
+
+    def __iter__(self):
+        return iter((self.train_x, self.test_x, self.train_y, self.test_y))
+
+    @property
+    def feature_names(self):
+        return list(self.encoder.get_feature_names_out())
+
+
+def data_version(frame: pd.DataFrame) -> str:
+    """Content hash of a training frame (column names and values)."""
+    digest = hashlib.sha256("\x1f".join(map(str, frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def feature_cache_key(frame: pd.DataFrame, settings: dict) -> str:
+    """Cache key from the data version and the settings used to encode it."""
+    config_hash = json.dumps(
+        {**settings, "features_version": FEATURES_VERSION}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(
+        (data_version(frame) + config_hash).encode()
+    ).hexdigest()[:32]
+
+
+def build_features(
+    frame: pd.DataFrame, test_size: float, random_state: int = 11, key: str = None
+) -> FeatureSet:
+    """Split ``frame`` and encode both parts once, column by column."""
+    y = frame["churn"]
+    train_x, test_x, train_y, test_y = train_test_split(
+        frame.drop(["churn"], axis=1), y, test_size=test_size, random_state=random_state
+    )
+    encoder = FrameEncoder()
+    return FeatureSet(
+        encoder.fit_transform(train_x),
+        encoder.transform(test_x),
+        train_y.to_numpy(),
+        test_y.to_numpy(),
+        encoder,
+        key=key,
+    )
+
+
+class FeatureCache:
+    """Two-level cache of encoded feature sets: in memory, then on disk.
+
+    Entries are keyed by :func:`feature_cache_key`, so a ``/train`` call on
+    unchanged data with unchanged settings reuses the matrices of the last
+    one, even across restarts when ``cache_dir`` is set.
+    """
+
+    def __init__(self, cache_dir: str = None, max_entries: int = 2):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"features-{key}.joblib")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                features = joblib.load(self._path(key))
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable feature cache {key}: {str(e)}")
+                return None
+            self._remember(key, features)
+            return features
+        return None
+
+    def _remember(self, key, features):
+        with self._lock:
+            self._entries[key] = features
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        """Return the feature set for ``key``, calling ``build()`` on a miss."""
+        features = self.get(key)
+        if features is not None:
+            logger.info(f"Feature cache hit for {key}")
+            return features
+        features = build()
+        self._remember(key, features)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            joblib.dump(features, tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self._prune()
+        return features
+
+    def _prune(self, keep: int = 5):
+        """Delete all but the ``keep`` most recently written cache files."""
+        paths = sorted(
+            (
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir)
+                if name.startswith("features-") and name.endswith(".joblib")
+            ),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        for path in paths[keep:]:
+            os.remove(path)
@@ -0,0 +1,187 @@
+import logging
+import mlflow
+import pandas as pd
+import xgboost as xgb
+from copy import deepcopy
+from scipy import sparse
+from mlflow.tracking import MlflowClient
+from sklearn.pipeline import make_pipeline
+
+from utils import evaluate_model
+from tracking import active_experiment_id, log_batch, log_sklearn_model
+from common.db import read_sql
+from common.sqlite_writer import quote_identifier
+from common.encoders import encoder_input
+
+logger = logging.getLogger(__name__)
+
+# Run tag holding the last processdata rowid a model was trained on. Upserts
+# move a replaced row to a new highest rowid, so this covers updates too.
+WATERMARK_TAG = "data_watermark"
+
+
+def table_watermark(db_engine, tablename: str) -> int:
+    """Highest rowid currently in ``tablename`` (0 when empty)."""
+    row = db_engine.execute(
+        f"SELECT MAX(rowid) FROM {quote_identifier(tablename)}"
+    ).fetchone()
+    return int(row[0] or 0)
+
+
+def pull_rows_after(db_engine, tablename: str, watermark: int, dtypes: dict = None):
+    """Rows of ``tablename`` added or updated after ``watermark``, oldest first.
+
+    The rowid is returned as a ``row_id`` column.
+    """
+    query = (
+        f"SELECT rowid AS row_id, * FROM {quote_identifier(tablename)} "
+        "WHERE rowid > ? ORDER BY rowid"
+    )
+    return read_sql(db_engine, query, params=(watermark,), dtypes=dtypes)
+
+
+def supports_update(model) -> bool:
+    """Whether the final step of ``model`` can learn from new rows in place."""
+    estimator = model.steps[-1][1]
+    return isinstance(estimator, xgb.XGBClassifier) or hasattr(estimator, "partial_fit")
+
+
+def update_estimator(model, X: pd.DataFrame, y, boost_rounds: int = 20):
+    """Return a copy of the pipeline ``model`` updated with the rows ``X, y``.
+
+    XGBoost models keep boosting from their current trees (cut back to the
+    early-stopping optimum) for ``boost_rounds`` more rounds; estimators
+    with ``partial_fit`` take one more pass. The fitted encoder is reused
+    as it is, so categories it has not seen encode as zeros.
+    """
+    encoder = model[:-1]
+    estimator = model.steps[-1][1]
+    encoded = encoder.transform(encoder_input(model, X))
+
+    if isinstance(estimator, xgb.XGBClassifier):
+        booster = estimator.get_booster()
+        if booster.attr("best_iteration") is not None:
+            booster = booster[: int(booster.attr("best_iteration")) + 1]
+        booster.set_attr(best_iteration=None, best_score=None)
+        dnew = xgb.DMatrix(sparse.csr_matrix(encoded), label=y)
+        booster = xgb.train(
+            {"tree_method": "hist"},
+            dnew,
+            num_boost_round=boost_rounds,
+            xgb_model=booster,
+        )
+        updated = xgb.XGBClassifier()
+        updated.load_model(bytearray(booster.save_raw("json")))
+    else:
+        updated = deepcopy(estimator)
+        updated.partial_fit(encoded, y)
+
+    return make_pipeline(*[step for _, step in model.steps[:-1]], updated)
+
+
+def update_production_model(config, db_engine, tablename: str, dtypes: dict = None):
+    """Update the Production model with the rows added since its watermark.
+
+    The newest ``holdout_fraction`` of the new rows is held out; the rest
+    updates the model. The result is logged as a run, with the new
+    watermark and its ``holdout_*`` metrics, and registered as a new version,
+    which becomes Production when ``promote`` is set and it scores at least
+    as well as the current model on the holdout rows.
+
+    Returns a summary dict; ``updated`` is False (with a ``reason``) when
+    the model cannot be updated incrementally and needs a full ``/train``.
+    """
+    settings = config.get("incremental", {})
+    model_name = settings.get("model_name", "customerchurn")
+    client = MlflowClient()
+
+    try:
+        version = client.get_model_version_by_alias(model_name, "Production")
+    except Exception:
+        return {"updated": False, "reason": f"No Production version of {model_name}"}
+    base_run = client.get_run(version.run_id)
+    if WATERMARK_TAG not in base_run.data.tags:
+        return {"updated": False, "reason": "Production model has no data watermark"}
+    watermark = int(base_run.data.tags[WATERMARK_TAG])
+
+    model = mlflow.sklearn.load_model(f"models:/{model_name}@Production")
+    if not supports_update(model):
+        return {
+            "updated": False,
+            "reason": f"{type(model.steps[-1][1]).__name__} cannot be updated incrementally",
+        }
+
+    data = pull_rows_after(db_engine, tablename, watermark, dtypes=dtypes)
+    if len(data) < settings.get("min_rows", 50):
+        return {
+            "updated": False,
+            "reason": f"Only {len(data)} new rows since watermark {watermark}",
+        }
+    new_watermark = int(data["row_id"].max())
+    y = data.pop("churn").to_numpy()
+    X = data.drop(columns=["row_id", "customerid", "date"], errors="ignore")
+
+    holdout = max(int(len(X) * settings.get("holdout_fraction", 0.2)), 1)
+    update_classes = len(set(y[:-holdout]))
+    if len(X) - holdout < 1 or update_classes < 2:
+        return {
+            "updated": False,
+            "reason": (
+                f"{len(X) - holdout} update rows with {update_classes} class(es) "
+                f"after holding out {holdout} of {len(X)} new rows"
+            ),
+        }
+    updated = update_estimator(
+        model, X.iloc[:-holdout], y[:-holdout], settings.get("boost_rounds", 20)
+    )
+    X_holdout, y_holdout = X.iloc[-holdout:], y[-holdout:]
+    current_eval = evaluate_model(
+        y_holdout, model.predict(encoder_input(model, X_holdout))
+    )
+    updated_eval = evaluate_model(
+        y_holdout, updated.predict(encoder_input(updated, X_holdout))
+    )
+
+    tags = {
+        "developer": config["base"]["developer"],
+        "model_name": base_run.data.tags.get("model_name", "unknown"),
+        "training_mode": "incremental",
+        WATERMARK_TAG: new_watermark,
+    }
+    params = {
+        "base_version": version.version,
+        "base_run_id": version.run_id,
+        "update_rows": len(X) - holdout,
+        "holdout_rows": holdout,
+    }
+    # Scored on the few holdout rows only: logged under their own names, so
+    # best-run selection never ranks them against full test-set metrics
+    metrics = {f"holdout_{name}": value for name, value in updated_eval.items()}
+    with mlflow.start_run(experiment_id=active_experiment_id(config)) as run:
+        log_batch(client, run.info.run_id, params, metrics, tags)
+        model_info = log_sklearn_model(updated, config["base"]["artifact_path"])
+    new_version = client.create_model_version(
+        name=model_name, source=model_info.model_uri, run_id=run.info.run_id
+    )
+
+    promoted = settings.get("promote", True) and (
+        updated_eval["f1_score"] >= current_eval["f1_score"]
+    )
+    if promoted:
+        client.set_registered_model_alias(model_name, "Production", new_version.version)
+    logger.info(
+        f"Updated {model_name} v{version.version} with {len(X) - holdout} rows "
+        f"after watermark {watermark}: v{new_version.version}, holdout f1 "
+        f"{current_eval['f1_score']:.4f} -> {updated_eval['f1_score']:.4f}"
+        f"{' (promoted)' if promoted else ''}"
+    )
+    return {
+        "updated": True,
+        "promoted": bool(promoted),
+        "model_version": new_version.version,
+        "run_id": run.info.run_id,
+        "watermark": new_watermark,
+        "rows": len(X),
+        "current_metrics": current_eval,
+        "updated_metrics": updated_eval,
+    }
@@ -0,0 +1,127 @@
+import logging
+import pandas as pd
+from common.db import build_select, read_sql
+from common.sqlite_writer import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+
+def _xor(a: str, b: str) -> str:
+    # SQLite has no XOR operator: a ^ b == (a | b) - (a & b)
+    return f"(({a} | {b}) - ({a} & {b}))"
+
+
+def sample_order(seed: int = 11) -> str:
+    """SQL expression giving every row a fixed pseudo-random rank.
+
+    A seeded multiplicative hash of the rowid: unlike ``RANDOM()`` the same seed
+    draws the same sample, so unchanged data and settings hit the feature
+    cache. With ``LIMIT`` SQLite keeps only the top rows while scanning.
+
+    Every step is masked to 32 bits and the multipliers are below 2**31, so
+    no product reaches 2**63 and SQLite never falls back to REAL arithmetic.
+    Each step is a bijection of the 32-bit rowid, so ranks are distinct.
+    """
+    mask = (int(seed) * 1597334677 + 374761393) & 4294967295
+    mixed = f"(((rowid & 4294967295) * 1597334677) & 4294967295)"
+    mixed = f"(({_xor(mixed, str(mask))} * 2028178513) & 4294967295)"
+    return _xor(mixed, f"({mixed} >> 15)")
+
+
+def window_clause(date_column: str, start_date=None, end_date=None):
+    """WHERE clause and params for an inclusive ``YYYY-MM-DD`` date window."""
+    clauses, params = [], []
+    if start_date:
+        clauses.append(f"{quote_identifier(date_column)} >= ?")
+        params.append(str(start_date))
+    if end_date:
+        clauses.append(f"{quote_identifier(date_column)} <= ?")
+        params.append(str(end_date))
+    return " AND ".join(clauses) or None, params
+
+
+def required_columns(columns, *required) -> list:
+    """``columns`` plus any of ``required`` it leaves out (None keeps all)."""
+    if columns is None:
+        return None
+    columns = list(columns)
+    return columns + [col for col in required if col and col not in columns]
+
+
+def class_counts(db_engine, tablename: str, label: str, where=None, params=()):
+    """Row count per (non-null) ``label`` value, counted in the database."""
+    column = quote_identifier(label)
+    where = f"({where}) AND {column} IS NOT NULL" if where else f"{column} IS NOT NULL"
+    query = (
+        f"SELECT {column}, COUNT(*) FROM {quote_identifier(tablename)} "
+        f"WHERE {where} GROUP BY {column}"
+    )
+    return dict(db_engine.execute(query, list(params)).fetchall())
+
+
+def allocate(counts: dict, max_rows: int) -> dict:
+    """Split ``max_rows`` over the classes in proportion to ``counts``.
+
+    Largest-remainder rounding, with at least one row for every class that
+    has any, and never more than a class has.
+    """
+    total = sum(counts.values())
+    if total <= max_rows:
+        return dict(counts)
+    shares = {value: max_rows * count / total for value, count in counts.items()}
+    quotas = {value: max(1, int(share)) for value, share in shares.items()}
+    by_remainder = sorted(shares, key=lambda value: shares[value] - int(shares[value]))
+    while sum(quotas.values()) < max_rows and by_remainder:
+        value = by_remainder.pop()
+        quotas[value] += 1
+    return {value: min(quota, counts[value]) for value, quota in quotas.items()}
+
+
+def sample_training_rows(
+    db_engine, tablename: str, settings: dict, columns: list = None, dtypes: dict = None
+) -> pd.DataFrame:
+    """Draw the training sample described by ``settings`` in SQL.
+
+    ``settings`` is the ``sampling`` section of training.yaml: an inclusive
+    ``start_date``/``end_date`` window, a ``max_rows`` budget, the
+    ``stratify`` label whose class mix the sample keeps, and a ``seed``.
+    Only the sampled rows are read out of the database. A ``columns``
+    projection always includes the date column and the stratify label.
+    """
+    date_column = settings.get("date_column", "date")
+    where, params = window_clause(
+        date_column, settings.get("start_date"), settings.get("end_date")
+    )
+    max_rows = settings.get("max_rows")
+    order = sample_order(settings.get("seed", 11))
+    label = settings.get("stratify")
+    columns = required_columns(columns, date_column, label)
+
+    if not max_rows:
+        query = build_select(tablename, columns, where)
+    elif not label:
+        query = build_select(tablename, columns, where, order_by=order, limit=max_rows)
+    else:
+        quotas = allocate(
+            class_counts(db_engine, tablename, label, where, params), max_rows
+        )
+        logger.info(f"Sampling {tablename} by {label}: {quotas}")
+        parts, part_params = [], []
+        for value, quota in quotas.items():
+            clause = f"{quote_identifier(label)} = ?"
+            part = build_select(
+                tablename,
+                columns,
+                f"({where}) AND {clause}" if where else clause,
+                order_by=order,
+                limit=quota,
+            )
+            parts.append(f"SELECT * FROM ({part})")
+            part_params += [*params, value]
+        if not parts:
+            return read_sql(
+                db_engine, build_select(tablename, columns, "0"), dtypes=dtypes
+            )
+        query, params = " UNION ALL ".join(parts), part_params
+
+    return read_sql(db_engine, query, params=params, dtypes=dtypes)
@@ -0,0 +1,246 @@
+import os
+import logging
+import numpy as np
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+
+from hyperopt import Trials, base, fmin, space_eval, tpe
+from hyperopt.pyll.stochastic import sample
+from hyperopt.utils import coarse_utcnow
+
+logger = logging.getLogger(__name__)
+
+
+# Object whose ``objective`` the trials of a search call, installed once in
+# every worker process by the pool initializer (see ``shared_objective``)
+_shared = None
+
+
+def install_shared(obj) -> None:
+    """Pool initializer: keep ``obj`` for the trials run in this worker."""
+    global _shared
+    _shared = obj
+
+
+def shared_objective(params):
+    """Evaluate ``params`` with the ``objective`` of the installed object.
+
+    Submit this with ``initializer=install_shared, initargs=(obj,)`` instead
+    of the bound ``obj.objective``: the object and the matrices it holds then
+    reach each worker once, and every task carries only its params.
+    """
+    return _shared.objective(params)
+
+
+def search_parallelism(config: dict = None) -> int:
+    """Number of trials to evaluate at once, from the ``search`` config section.
+
+    ``parallelism: null`` (the default) uses every core.
+    """
+    parallelism = (config or {}).get("parallelism") or os.cpu_count() or 1
+    return max(1, int(parallelism))
+
+
+def parallel_fmin(
+    fn,
+    space,
+    max_evals: int,
+    parallelism: int = 1,
+    algo=tpe.suggest,
+    trials: Trials = None,
+    seed: int = None,
+    initializer=None,
+    initargs=(),
+    on_trial=None,
+):
+    """Minimize ``fn`` over ``space`` like ``fmin``, several trials at a time.
+
+    Trials are evaluated in a pool of worker processes. Whenever one finishes
+    its result is fed back into ``trials`` and ``algo`` suggests the next
+    point, so TPE keeps learning from every completed trial while the other
+    workers are busy. ``fn`` and its arguments must be picklable; each worker
+    runs ``initializer(*initargs)`` once, e.g. :func:`install_shared` to
+    hand it the training data shared by every trial.
+
+    ``on_trial()`` is called in this process after every finished trial, to
+    report progress; an exception raised from it (e.g. a cancelled job)
+    stops the search and drops the trials that have not started.
+
+    Returns the best point in the same form as ``fmin``.
+    """
+    trials = Trials() if trials is None else trials
+    if parallelism <= 1:
+        return fmin(
+            fn=fn,
+            space=space,
+            algo=algo,
+            max_evals=max_evals,
+            trials=trials,
+            rstate=np.random.default_rng(seed),
+            early_stop_fn=_early_stop(on_trial) if on_trial else None,
+        )
+
+    domain = base.Domain(fn, space)
+    rstate = np.random.default_rng(seed)
+    pending = {}
+    submitted = len(trials.trials)
+
+    pool = ProcessPoolExecutor(
+        max_workers=parallelism, initializer=initializer, initargs=initargs
+    )
+    try:
+        while submitted < max_evals or pending:
+            # Keep every worker busy with a fresh suggestion
+            while submitted < max_evals and len(pending) < parallelism:
+                new_ids = trials.new_trial_ids(1)
+                trials.refresh()
+                docs = algo(new_ids, domain, trials, rstate.integers(2**31 - 1))
+                trials.insert_trial_docs(docs)
+                # Trials stores copies; mark those as running
+                docs = [t for t in trials._dynamic_trials if t["tid"] in new_ids]
+                for doc in docs:
+                    doc["state"] = base.JOB_STATE_RUNNING
+                    doc["book_time"] = doc["refresh_time"] = coarse_utcnow()
+                trials.refresh()
+                for doc in docs:
+                    params = space_eval(space, base.spec_from_misc(doc["misc"]))
+                    pending[pool.submit(fn, params)] = doc
+                submitted += len(docs)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                doc = pending.pop(future)
+                doc["refresh_time"] = coarse_utcnow()
+                try:
+                    doc["result"] = future.result()
+                    doc["state"] = base.JOB_STATE_DONE
+                except Exception as e:
+                    logger.error(f"Trial {doc['tid']} failed: {str(e)}")
+                    doc["state"] = base.JOB_STATE_ERROR
+                    doc["misc"]["error"] = (str(type(e)), str(e))
+                    trials.refresh()
+                    raise
+                trials.refresh()
+                if on_trial is not None:
+                    on_trial()
+    except BaseException:
+        # Do not start queued trials; running ones finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    return trials.argmin
+
+
+def _early_stop(on_trial):
+    """Adapt ``on_trial`` to the ``early_stop_fn`` hook of ``fmin``."""
+
+    def early_stop_fn(trials, *args):
+        on_trial()
+        return False, args
+
+    return early_stop_fn
+
+
+def halving_schedule(n_candidates: int, min_budget: float, eta: int = 3):
+    """Rungs of a successive halving search as ``(budget, candidates)`` pairs.
+
+    Budgets are fractions of the full training budget, growing by ``eta``
+    from ``min_budget`` up to 1.0; each rung keeps the best ``1 / eta`` of
+    the candidates of the one before.
+    """
+    budgets = []
+    budget = min_budget
+    # A budget within 5% of the full one is rounded up to it
+    while budget < 0.95:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(1.0)
+
+    schedule = []
+    for budget in budgets:
+        schedule.append((budget, n_candidates))
+        n_candidates = max(1, n_candidates // eta)
+    return schedule
+
+
+def successive_halving(
+    fn,
+    space,
+    n_candidates: int,
+    min_budget: float = 1 / 9,
+    eta: int = 3,
+    parallelism: int = 1,
+    seed: int = None,
+    initializer=None,
+    initargs=(),
+    on_trial=None,
+    results: list = None,
+):
+    """Multi-fidelity random search: score many candidates cheaply, refine few.
+
+    ``n_candidates`` points are drawn from ``space`` and evaluated with
+    ``fn({**params, "budget": b})`` at the smallest budget ``b``, e.g. the
+    fraction of training rows to fit on. Only the best ``1 / eta`` are
+    promoted to the next rung with ``eta`` times the budget, up to the full
+    budget of 1.0, so most of the work goes into configurations that are
+    still competitive. ``fn`` returns a dict with a ``loss`` like an
+    objective for ``fmin``.
+
+    Evaluations run in a pool of worker processes as in
+    :func:`parallel_fmin`, with the same ``initializer`` and ``on_trial``
+    hooks. Every result at full budget is appended to ``results`` if given,
+    as it finishes. Returns ``(best_params, best_result)`` from the
+    full-budget rung; the params are values, not the ``hp.choice`` indices
+    ``fmin`` returns.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = [sample(space, rng=rng) for _ in range(n_candidates)]
+    pool = None
+    if parallelism > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=parallelism, initializer=initializer, initargs=initargs
+        )
+    try:
+        for budget, size in halving_schedule(n_candidates, min_budget, eta):
+            candidates = candidates[:size]
+            collect = results if budget >= 1.0 else None
+            rung = _evaluate_rung(fn, candidates, budget, pool, on_trial, collect)
+            order = sorted(range(len(rung)), key=lambda i: rung[i]["loss"])
+            candidates = [candidates[i] for i in order]
+            rung = [rung[i] for i in order]
+            logger.info(
+                f"Halving rung at budget {budget:.3f}: {len(rung)} candidates, "
+                f"best loss {rung[0]['loss']:.4f}"
+            )
+    except BaseException:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    if pool is not None:
+        pool.shutdown()
+
+    return candidates[0], rung[0]
+
+
+def _evaluate_rung(fn, candidates, budget, pool, on_trial, collect=None):
+    """Evaluate every candidate at ``budget``; results keep candidate order."""
+    jobs = [{**params, "budget": budget} for params in candidates]
+    if pool is None:
+        finished = ((i, fn(params)) for i, params in enumerate(jobs))
+    else:
+        futures = {pool.submit(fn, params): i for i, params in enumerate(jobs)}
+        finished = ((futures[f], f.result()) for f in as_completed(futures))
+
+    results = [None] * len(jobs)
+    for i, result in finished:
+        results[i] = result
+        if collect is not None:
+            collect.append(result)
+        if on_trial is not None:
+            on_trial()
+    return results
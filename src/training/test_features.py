@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from .features import FeatureCache, build_features, feature_cache_key
+
+
+def training_frame(rows=40):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "contract": rng.choice(["month", "year"], rows),
+            "tenure": rng.integers(0, 70, rows),
+            "churn": rng.integers(0, 2, rows),
+        }
+    )
+
+
+def test_features_are_encoded_once_per_key(tmp_path):
+    frame = training_frame()
+    settings = {"test_size": 0.25, "random_state": 11}
+    key = feature_cache_key(frame, settings)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return build_features(frame, key=key, **settings)
+
+    features = FeatureCache(str(tmp_path)).get_or_build(key, build)
+    again = FeatureCache(str(tmp_path)).get_or_build(key, build)
+
+    assert len(builds) == 1
+    train_x, test_x, train_y, test_y = again
+    assert train_x.shape == (30, 3) and test_x.shape == (10, 3)
+    assert train_x.dtype == np.float32 and train_x.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(train_x, features.train_x)
+    assert again.feature_names == ["contract=month", "contract=year", "tenure"]
+
+
+def test_cache_key_tracks_data_and_settings():
+    frame = training_frame()
+    settings = {"test_size": 0.25}
+    key = feature_cache_key(frame, settings)
+
+    assert feature_cache_key(frame.copy(), settings) == key
+    assert feature_cache_key(frame, {"test_size": 0.3}) != key
+    changed = frame.assign(tenure=frame["tenure"] + 1)
+    assert feature_cache_key(changed, settings) != key
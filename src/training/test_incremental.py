@@ -0,0 +1,141 @@
+import sqlite3
+import mlflow
+import mlflow.sklearn
+import numpy as np
+import pytest
+import pandas as pd
+import xgboost as xgb
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
+
+from common.encoders import FrameEncoder
+from mlflow.tracking import MlflowClient
+from .incremental import (
+    WATERMARK_TAG,
+    pull_rows_after,
+    table_watermark,
+    update_estimator,
+    update_production_model,
+)
+from .tracking import log_sklearn_model
+
+
+def churn_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {"contract": rng.choice(["a", "b"], n), "tenure": rng.integers(0, 70, n)}
+    )
+    churn = ((frame["tenure"] < 20) & (frame["contract"] == "a")).astype(int)
+    return frame, churn.to_numpy()
+
+
+def test_rows_after_watermark():
+    engine = sqlite3.connect(":memory:")
+    frame, churn = churn_frame(10, 0)
+    frame.assign(churn=churn).to_sql("processdata", engine, index=False)
+
+    assert table_watermark(engine, "processdata") == 10
+    rows = pull_rows_after(engine, "processdata", 7)
+    assert rows["row_id"].tolist() == [8, 9, 10]
+    engine.execute("CREATE TABLE empty_table (x)")
+    assert table_watermark(engine, "empty_table") == 0
+
+
+def test_xgboost_update_continues_from_best_iteration():
+    frame, churn = churn_frame(500, 1)
+    encoder = FrameEncoder().fit(frame)
+    dtrain = xgb.DMatrix(encoder.transform(frame), label=churn)
+    booster = xgb.train(
+        {"objective": "binary:logistic", "tree_method": "hist"},
+        dtrain,
+        num_boost_round=30,
+        evals=[(dtrain, "train")],
+        early_stopping_rounds=3,
+        verbose_eval=False,
+    )
+    classifier = xgb.XGBClassifier()
+    classifier.load_model(bytearray(booster.save_raw("json")))
+    model = make_pipeline(encoder, classifier)
+
+    new_frame, new_churn = churn_frame(200, 2)
+    updated = update_estimator(model, new_frame, new_churn, boost_rounds=5)
+
+    trees = updated[-1].get_booster().num_boosted_rounds()
+    assert trees == booster.best_iteration + 1 + 5
+    assert updated[0] is encoder
+    assert model[-1].get_booster().num_boosted_rounds() == booster.num_boosted_rounds()
+    assert (updated.predict(new_frame) == new_churn).mean() > 0.9
+
+
+def test_partial_fit_update_leaves_original_untouched():
+    frame, churn = churn_frame(300, 3)
+    encoder = FrameEncoder().fit(frame)
+    model = make_pipeline(encoder, SGDClassifier(loss="log_loss", random_state=0))
+    model.fit(frame, churn)
+    coef = model[-1].coef_.copy()
+
+    updated = update_estimator(model, *churn_frame(100, 4))
+
+    np.testing.assert_array_equal(model[-1].coef_, coef)
+    assert not np.array_equal(updated[-1].coef_, coef)
+
+
+@pytest.fixture
+def production(tmp_path):
+    """An XGBoost pipeline registered as Production after 300 rows."""
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path}/mlflow.db")
+    mlflow.create_experiment("updates", artifact_location=(tmp_path / "artifacts").as_uri())
+    mlflow.set_experiment("updates")
+    config = {
+        "base": {"experiment_name": "updates", "artifact_path": "model", "developer": "test"},
+        "incremental": {"min_rows": 10, "boost_rounds": 5},
+    }
+    frame, churn = churn_frame(300, 5)
+    model = make_pipeline(FrameEncoder(), xgb.XGBClassifier(n_estimators=10))
+    model.fit(frame, churn)
+    engine = sqlite3.connect(":memory:")
+    frame.assign(churn=churn).to_sql("processdata", engine, index=False)
+    with mlflow.start_run(tags={WATERMARK_TAG: 300}) as run:
+        model_info = log_sklearn_model(model, "model")
+    client = MlflowClient()
+    client.create_registered_model("customerchurn")
+    version = client.create_model_version(
+        "customerchurn", model_info.model_uri, run.info.run_id
+    )
+    client.set_registered_model_alias("customerchurn", "Production", version.version)
+    return config, engine
+
+
+def test_update_logs_and_registers_xgboost_pipeline(production):
+    config, engine = production
+    new_frame, new_churn = churn_frame(100, 6)
+    new_frame.assign(churn=new_churn).to_sql(
+        "processdata", engine, index=False, if_exists="append"
+    )
+
+    summary = update_production_model(config, engine, "processdata")
+
+    assert summary["updated"] and summary["watermark"] == 400
+    loaded = mlflow.sklearn.load_model(
+        f"models:/customerchurn/{summary['model_version']}"
+    )
+    assert loaded[-1].get_booster().num_boosted_rounds() == 15
+    metrics = MlflowClient().get_run(summary["run_id"]).data.metrics
+    assert "holdout_f1_score" in metrics and "f1_score" not in metrics
+
+
+def test_update_needs_rows_of_both_classes_besides_the_holdout(production):
+    config, engine = production
+    new_frame, _ = churn_frame(12, 7)
+    new_frame.assign(churn=0).to_sql(
+        "processdata", engine, index=False, if_exists="append"
+    )
+
+    one_class = update_production_model(config, engine, "processdata")
+    config["incremental"]["holdout_fraction"] = 1.0
+    all_held_out = update_production_model(config, engine, "processdata")
+
+    assert not one_class["updated"]
+    assert "1 class(es)" in one_class["reason"]
+    assert not all_held_out["updated"]
+    assert all_held_out["reason"].startswith("0 update rows")
@@ -0,0 +1,92 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from .sampling import allocate, sample_order, sample_training_rows
+
+
+def history_db():
+    engine = sqlite3.connect(":memory:")
+    frame = pd.DataFrame(
+        {
+            "customerid": [f"c{i}" for i in range(1000)],
+            "date": [f"2024-0{1 + i % 4}-01" for i in range(1000)],
+            "churn": [1 if i % 4 == 0 else 0 for i in range(1000)],
+        }
+    )
+    frame.to_sql("processdata", engine, index=False)
+    return engine
+
+
+def test_allocate_keeps_class_mix_within_budget():
+    assert allocate({0: 750, 1: 250}, 100) == {0: 75, 1: 25}
+    assert allocate({0: 999, 1: 1}, 10) == {0: 9, 1: 1}
+    assert allocate({0: 5, 1: 3}, 100) == {0: 5, 1: 3}
+    assert sum(allocate({0: 500, 1: 300, 2: 200}, 7).values()) == 7
+
+
+def test_stratified_sample_in_window_is_reproducible():
+    engine = history_db()
+    settings = {
+        "start_date": "2024-02-01",
+        "end_date": "2024-03-01",
+        "max_rows": 100,
+        "stratify": "churn",
+        "seed": 3,
+    }
+
+    sample = sample_training_rows(engine, "processdata", settings)
+    again = sample_training_rows(engine, "processdata", settings)
+
+    assert len(sample) == 100
+    assert set(sample["date"]) <= {"2024-02-01", "2024-03-01"}
+    # Rows with i % 4 == 1 or 2 fall in the window; none of them churn
+    assert sample["churn"].sum() == 0
+    assert sample["customerid"].tolist() == again["customerid"].tolist()
+    other = sample_training_rows(engine, "processdata", {**settings, "seed": 4})
+    assert set(other["customerid"]) != set(sample["customerid"])
+
+
+def test_sample_mixes_history_and_respects_budget():
+    engine = history_db()
+
+    sample = sample_training_rows(
+        engine, "processdata", {"max_rows": 200, "stratify": "churn"}, columns=["date", "churn"]
+    )
+
+    assert list(sample.columns) == ["date", "churn"]
+    assert len(sample) == 200
+    assert sample["churn"].mean() == 0.25
+    assert sample["date"].nunique() == 4
+    assert len(sample_training_rows(engine, "processdata", {})) == 1000
+
+
+def test_column_projection_always_keeps_date_and_label():
+    engine = history_db()
+    settings = {"max_rows": 40, "stratify": "churn", "start_date": "2024-02-01"}
+
+    sample = sample_training_rows(engine, "processdata", settings, columns=["customerid"])
+
+    assert list(sample.columns) == ["customerid", "date", "churn"]
+    assert len(sample) == 40
+    assert sample["date"].min() >= "2024-02-01"
+
+
+def test_sample_order_ranks_are_distinct_and_uniform_for_large_rowids():
+    engine = sqlite3.connect(":memory:")
+    engine.execute("CREATE TABLE processdata (churn)")
+    rowids = np.random.default_rng(0).choice(2**32, 20000, replace=False) + 1
+    engine.executemany(
+        "INSERT INTO processdata (rowid, churn) VALUES (?, 0)",
+        [(int(rowid),) for rowid in rowids],
+    )
+
+    ranks = [
+        rank for (rank,) in engine.execute(f"SELECT {sample_order(5)} FROM processdata")
+    ]
+
+    assert all(isinstance(rank, int) for rank in ranks)
+    assert len(set(ranks)) == len(ranks)
+    assert 0 <= min(ranks) and max(ranks) < 2**32
+    deciles = np.bincount(np.array(ranks) * 10 // 2**32, minlength=10)
+    assert deciles.min() > 1800 and deciles.max() < 2200
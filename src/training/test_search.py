@@ -0,0 +1,138 @@
+import os
+import pytest
+from hyperopt import STATUS_OK, Trials, hp
+
+from .search import (
+    halving_schedule,
+    install_shared,
+    parallel_fmin,
+    search_parallelism,
+    shared_objective,
+    successive_halving,
+)
+
+
+def quadratic(params):
+    loss = (params["x"] - 3) ** 2 + (0 if params["kind"] == "a" else 1)
+    return {"loss": loss, "status": STATUS_OK, "pid": os.getpid()}
+
+
+def test_parallel_fmin_runs_every_trial_in_workers():
+    space = {"x": hp.uniform("x", -10, 10), "kind": hp.choice("kind", ["a", "b"])}
+    trials = Trials()
+
+    best = parallel_fmin(
+        quadratic, space, max_evals=20, parallelism=2, trials=trials, seed=1
+    )
+
+    assert len(trials.trials) == 20
+    assert all(result["status"] == STATUS_OK for result in trials.results)
+    assert os.getpid() not in {result["pid"] for result in trials.results}
+    # Same return format as hyperopt.fmin: choice labels map to indices
+    assert set(best) == {"x", "kind"}
+    assert trials.best_trial["result"]["loss"] == min(trials.losses())
+
+
+class Shifted:
+    """Stands in for a model class holding the training matrices."""
+
+    def __init__(self, shift):
+        self.shift = shift
+
+    def objective(self, params):
+        return quadratic({**params, "x": params["x"] - self.shift})
+
+
+def test_shared_object_is_installed_once_per_worker():
+    space = {"x": hp.uniform("x", -10, 10), "kind": hp.choice("kind", ["a", "b"])}
+    trials = Trials()
+
+    best = parallel_fmin(
+        shared_objective,
+        space,
+        max_evals=20,
+        parallelism=2,
+        trials=trials,
+        seed=1,
+        initializer=install_shared,
+        initargs=(Shifted(2),),
+    )
+    _, result = successive_halving(
+        shared_objective,
+        space,
+        n_candidates=9,
+        parallelism=2,
+        seed=1,
+        initializer=install_shared,
+        initargs=(Shifted(2),),
+    )
+
+    assert abs(best["x"] - 5) < abs(best["x"] - 3)
+    assert os.getpid() not in {result["pid"] for result in trials.results}
+    assert result["pid"] != os.getpid()
+
+
+def test_search_parallelism_defaults_to_all_cores():
+    assert search_parallelism({"parallelism": 3}) == 3
+    assert search_parallelism({"parallelism": None}) == (os.cpu_count() or 1)
+
+
+class StopSearch(Exception):
+    pass
+
+
+def test_on_trial_reports_progress_and_can_stop_the_search():
+    space = {"x": hp.uniform("x", -10, 10), "kind": hp.choice("kind", ["a", "b"])}
+    finished = []
+
+    def on_trial():
+        finished.append(1)
+        if len(finished) == 3:
+            raise StopSearch()
+
+    for parallelism in (1, 2):
+        finished.clear()
+        trials = Trials()
+        with pytest.raises(StopSearch):
+            parallel_fmin(
+                quadratic,
+                space,
+                max_evals=20,
+                parallelism=parallelism,
+                trials=trials,
+                seed=1,
+                on_trial=on_trial,
+            )
+        assert len(finished) == 3
+        assert len(trials.trials) < 20
+
+
+def budgeted_quadratic(params):
+    # Low budgets see a noisy but informative version of the loss
+    noise = (1 - params["budget"]) * ((params["x"] * 7) % 1)
+    return {"loss": (params["x"] - 3) ** 2 + noise, "budget": params["budget"]}
+
+
+def test_halving_schedule_promotes_top_fraction_to_full_budget():
+    assert halving_schedule(27, 1 / 9, eta=3) == [(1 / 9, 27), (1 / 3, 9), (1.0, 3)]
+    assert halving_schedule(10, 1.0) == [(1.0, 10)]
+
+
+def test_successive_halving_returns_best_full_budget_candidate():
+    space = {"x": hp.uniform("x", -10, 10), "kind": "a"}
+    budgets = []
+
+    best, result = successive_halving(
+        budgeted_quadratic,
+        space,
+        n_candidates=27,
+        min_budget=1 / 9,
+        parallelism=2,
+        seed=3,
+        on_trial=lambda: budgets.append(1),
+    )
+
+    assert len(budgets) == 27 + 9 + 3
+    assert result["budget"] == 1.0
+    assert best["kind"] == "a" and "budget" not in best
+    assert abs(best["x"] - 3) < 2
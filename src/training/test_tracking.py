@@ -0,0 +1,62 @@
+import sys
+import mlflow
+import mlflow.sklearn
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from common.encoders import FrameEncoder
+from .tracking import TrialLogger
+
+
+@pytest.fixture
+def experiment(tmp_path):
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path}/mlflow.db")
+    mlflow.create_experiment("trials", artifact_location=(tmp_path / "artifacts").as_uri())
+    mlflow.set_experiment("trials")
+    return {
+        "base": {"experiment_name": "trials", "artifact_path": "model"},
+        "tracking": {"top_k": 2, "stage_dir": str(tmp_path)},
+    }
+
+
+def test_trial_logger_writes_all_runs_but_only_top_models(
+    tmp_path, monkeypatch, experiment
+):
+    logged = []
+    monkeypatch.setattr(
+        sys.modules["mlflow.sklearn"],
+        "log_model",
+        lambda model, **kwargs: logged.append(model),
+    )
+    trial_logger = TrialLogger(experiment)
+    results = []
+    for i, f1 in enumerate([0.5, 0.8, 0.7, 0.7, 0.6]):
+        model = DummyClassifier(constant=i)
+        trial = trial_logger.record({"i": i}, {"f1_score": f1}, {"model_name": "m"}, model)
+        results.append({"loss": -f1, "trial": trial})
+
+    run_ids = trial_logger.flush(results + [{"status": "new"}])
+
+    assert len(run_ids) == 5
+    runs = mlflow.search_runs(experiment_names=["trials"])
+    assert sorted(runs["params.i"]) == ["0", "1", "2", "3", "4"]
+    # Top two plus the tie with the second best
+    assert sorted(model.constant for model in logged) == [1, 2, 3]
+    assert not any(path.name.startswith("trials-") for path in tmp_path.iterdir())
+
+
+def test_frame_encoder_pipeline_is_logged_and_loads(experiment):
+    frame = pd.DataFrame({"contract": ["a", "b", "a", "b"], "tenure": [1, 50, 3, 60]})
+    churn = [1, 0, 1, 0]
+    model = make_pipeline(FrameEncoder(), LogisticRegression()).fit(frame, churn)
+    trial_logger = TrialLogger(experiment)
+    trial = trial_logger.record({}, {"f1_score": 1.0}, {}, model)
+
+    (run_id,) = trial_logger.flush([{"loss": -1.0, "trial": trial}])
+
+    loaded = mlflow.sklearn.load_model(f"runs:/{run_id}/model")
+    assert isinstance(loaded[0], FrameEncoder)
+    assert list(loaded.predict(frame)) == churn
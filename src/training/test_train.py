@@ -0,0 +1,233 @@
+import threading
+import time
+
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+from mlflow.tracking import MlflowClient
+
+from common.jobs import JobManager
+
+from . import train
+from .features import build_features
+
+
+def churn_frame(rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {
+            "contract": rng.choice(["month", "year"], rows),
+            "tenure": rng.integers(0, 70, rows),
+        }
+    )
+    noise = rng.random(rows) < 0.15
+    churn = ((frame["tenure"] < 25) & (frame["contract"] == "month")) ^ noise
+    return frame.assign(churn=churn.astype(int))
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Training config with a local tracking store, returned by load_config."""
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path}/mlflow.db")
+    experiment_id = mlflow.create_experiment(
+        "training", artifact_location=(tmp_path / "artifacts").as_uri()
+    )
+    mlflow.set_experiment("training")
+    config = {
+        "base": {
+            "experiment_name": "training",
+            "artifact_path": "model",
+            "developer": "test",
+        },
+        "hyperparameters": {
+            "linear_model": {"min_c": 1, "max_c": 8, "interval": 2, "sweep": True},
+            "xgboost": {
+                "min_depth": 3,
+                "max_depth": 6,
+                "min_learning_rate": -2,
+                "max_learning_rate": 0,
+                "min_child_weight": 0,
+                "max_child_weight": 1,
+                "objective": "binary:logistic",
+                "eval_metric": "logloss",
+                "max_bin": 32,
+            },
+        },
+        "search": {"max_evals": 2},
+        "tracking": {"top_k": 1, "stage_dir": str(tmp_path)},
+        "experiment_id": experiment_id,
+    }
+    monkeypatch.setattr(train, "load_config", lambda: config)
+    return config
+
+
+@pytest.fixture
+def features():
+    return build_features(churn_frame(), test_size=0.25, random_state=11)
+
+
+def logged_runs(config):
+    return MlflowClient().search_runs([config["experiment_id"]])
+
+
+def runs_with_models(config):
+    models = mlflow.search_logged_models(
+        experiment_ids=[config["experiment_id"]], output_format="list"
+    )
+    return {model.source_run_id for model in models}
+
+
+def test_linear_sweep_warm_starts_in_ascending_c(config, features, monkeypatch):
+    fits = []
+    fit = train.LogisticRegression.fit
+
+    def recording_fit(self, X, y):
+        fits.append((self.C, self.warm_start, hasattr(self, "coef_")))
+        return fit(self, X, y)
+
+    monkeypatch.setattr(train.LogisticRegression, "fit", recording_fit)
+
+    best = train.linear_model_sweep(features, [5, 1, 3, 7], config)
+
+    assert fits == [(1, True, False), (3, True, True), (5, True, True), (7, True, True)]
+    runs = logged_runs(config)
+    assert sorted(int(run.data.params["c"]) for run in runs) == [1, 3, 5, 7]
+    scores = {run.info.run_id: run.data.metrics["f1_score"] for run in runs}
+    assert best == max(scores.values())
+    # Only the best run, and any tied with it, logs a model
+    assert runs_with_models(config) == {
+        run_id for run_id, score in scores.items() if score == best
+    }
+
+
+def test_xgboost_logs_a_pipeline_that_predicts_from_raw_frames(config, features):
+    trainer = train.XGBoost(features, num_boost_round=20, early_stopping_rounds=5)
+    trainer.inference("xgboost")
+
+    assert isinstance(trainer.dtrain, train.xgb.QuantileDMatrix)
+    runs = logged_runs(config)
+    assert len(runs) == config["search"]["max_evals"]
+    assert {run.data.tags["model_name"] for run in runs} == {"xgboost"}
+
+    models = mlflow.search_logged_models(
+        experiment_ids=[config["experiment_id"]], output_format="list"
+    )
+    assert models
+    pipeline = mlflow.sklearn.load_model(models[0].model_uri)
+    raw = churn_frame(rows=20, seed=1).drop(columns=["churn"])
+    predictions = pipeline.predict(raw)
+    assert len(predictions) == len(raw)
+    assert set(predictions) <= {0, 1}
+
+
+class StubTrainer:
+    """Stands in for run_training: four steps, each waiting for ``step``."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.step = threading.Event()
+        self.calls = 0
+
+    def __call__(self, job):
+        self.calls += 1
+        job.update(stage="stub", completed=0, total=4)
+        for _ in range(4):
+            job.advance()
+            self.started.set()
+            self.step.wait(5)
+        return {"trained": True}
+
+
+@pytest.fixture
+def trainer(monkeypatch):
+    trainer = StubTrainer()
+    monkeypatch.setattr(train, "run_training", trainer)
+    monkeypatch.setattr(train, "run_update", trainer)
+    return trainer
+
+
+@pytest.fixture
+def manager(monkeypatch, trainer):
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(train, "jobs", manager)
+    yield manager
+    trainer.step.set()
+    manager.shutdown()
+
+
+@pytest.fixture
+def client(manager):
+    return train.app.test_client()
+
+
+def wait_for_status(client, job_id, status, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        body = client.get(f"/train/jobs/{job_id}").get_json()
+        if body["status"] == status:
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {body}")
+
+
+def test_train_returns_a_job_id_and_dedupes(client, trainer):
+    first = client.post("/train")
+    assert first.status_code == 202
+    job_id = first.get_json()["job_id"]
+    assert trainer.started.wait(5)
+
+    again = client.post("/train")
+    assert again.status_code == 202
+    assert again.get_json()["job_id"] == job_id
+    # An update shares the training key, so it is not queued alongside either
+    update = client.post("/update")
+    assert update.status_code == 202
+    assert update.get_json()["job_id"] == job_id
+
+    trainer.step.set()
+    body = wait_for_status(client, job_id, "succeeded")
+    assert body["result"] == {"trained": True}
+    assert trainer.calls == 1
+
+
+def test_job_status_reports_progress_and_eta(client, trainer):
+    job_id = client.post("/train").get_json()["job_id"]
+    assert trainer.started.wait(5)
+
+    body = client.get(f"/train/jobs/{job_id}").get_json()
+    assert body["status"] == "running"
+    assert body["progress"] == {"stage": "stub", "completed": 1, "total": 4}
+    assert body["eta_seconds"] is not None and body["eta_seconds"] >= 0
+
+
+def test_cancel_running_job_stops_at_next_step(client, trainer):
+    job_id = client.post("/train").get_json()["job_id"]
+    assert trainer.started.wait(5)
+
+    response = client.post(f"/train/jobs/{job_id}/cancel")
+    assert response.status_code == 202
+    assert response.get_json()["cancel_requested"] is True
+
+    trainer.step.set()
+    body = wait_for_status(client, job_id, "cancelled")
+    assert body["progress"]["completed"] == 2
+    assert body["result"] is None
+
+
+def test_cancel_queued_job_never_starts(client, manager, trainer):
+    # Occupy the only worker so the training job stays queued
+    release = threading.Event()
+    manager.submit("blocker", lambda job: release.wait(5))
+    job_id = client.post("/train").get_json()["job_id"]
+    assert client.get(f"/train/jobs/{job_id}").get_json()["status"] == "queued"
+
+    assert client.post(f"/train/jobs/{job_id}/cancel").status_code == 202
+    release.set()
+    wait_for_status(client, job_id, "cancelled")
+    assert trainer.calls == 0
+
+
+def test_unknown_job_ids_are_not_found(client):
+    assert client.get("/train/jobs/missing").status_code == 404
+    assert client.post("/train/jobs/missing/cancel").status_code == 404
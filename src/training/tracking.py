@@ -0,0 +1,124 @@
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import joblib
+import mlflow
+import mlflow.sklearn
+from mlflow.tracking import MlflowClient
+from mlflow.entities import Metric, Param, RunTag
+
+
+def log_batch(client, run_id, params=None, metrics=None, tags=None):
+    """Log a run's params, metrics and tags in a single ``log_batch`` request."""
+    timestamp = int(time.time() * 1000)
+    client.log_batch(
+        run_id,
+        metrics=[
+            Metric(key, float(value), timestamp, 0)
+            for key, value in (metrics or {}).items()
+        ],
+        params=[Param(key, str(value)) for key, value in (params or {}).items()],
+        tags=[RunTag(key, str(value)) for key, value in (tags or {}).items()],
+    )
+
+
+def log_sklearn_model(model, artifact_path):
+    """Log a scikit-learn pipeline as the active run's model, with cloudpickle.
+
+    MLflow 3 defaults to skops, which refuses our own transformers
+    (``common.encoders.FrameEncoder``) and XGBoost estimators as untrusted
+    types; cloudpickle is what MLflow 2 used and what deployment loads.
+    """
+    return mlflow.sklearn.log_model(
+        model,
+        artifact_path=artifact_path,
+        serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE,
+    )
+
+
+def log_finished_run(client, experiment_id, params=None, metrics=None, tags=None):
+    """Record a run without artifacts: create, batch-log and close it."""
+    run = client.create_run(experiment_id)
+    log_batch(client, run.info.run_id, params, metrics, tags)
+    client.set_terminated(run.info.run_id)
+    return run.info.run_id
+
+
+def active_experiment_id(config):
+    """Id of the experiment named in the training config."""
+    return mlflow.get_experiment_by_name(config["base"]["experiment_name"]).experiment_id
+
+
+class TrialLogger:
+    """Buffer the runs of a search and log model artifacts only for the best.
+
+    ``record`` is called from the objective, possibly in a worker process: it
+    stages the fitted model in a local directory and returns a picklable
+    summary to put in the trial result under ``"trial"``. Nothing reaches
+    MLflow until ``flush``, which writes every recorded trial as a run with
+    one batch request and logs the model artifact of the ``top_k`` lowest
+    loss trials, plus any trial tied with the last of them, so the run that
+    deployment picks by F1 always has a model. ``tags`` are added to every
+    run, e.g. the data watermark of the features.
+    """
+
+    def __init__(self, config, top_k: int = None, tags: dict = None):
+        self.config = config
+        self.tags = tags or {}
+        tracking = config.get("tracking", {})
+        self.top_k = top_k or tracking.get("top_k", 1)
+        self.stage_dir = tempfile.mkdtemp(prefix="trials-", dir=tracking.get("stage_dir"))
+
+    def record(self, params, metrics, tags, model) -> dict:
+        path = os.path.join(self.stage_dir, f"{uuid.uuid4().hex}.joblib")
+        joblib.dump(model, path)
+        tags = {**self.tags, **tags}
+        return {"params": params, "metrics": metrics, "tags": tags, "model_path": path}
+
+    def flush(self, results):
+        """Log the trials in ``results`` (dicts with ``loss`` and ``trial``).
+
+        Returns the run ids in the order of ``results``. Staged models are
+        removed afterwards, also when logging fails.
+        """
+        results = [result for result in results if result and "trial" in result]
+        try:
+            if not results:
+                return []
+            losses = sorted(result["loss"] for result in results)
+            cutoff = losses[min(self.top_k, len(losses)) - 1]
+            client = MlflowClient()
+            experiment_id = active_experiment_id(self.config)
+            artifact_path = self.config["base"]["artifact_path"]
+
+            run_ids = []
+            for result in results:
+                trial = result["trial"]
+                if result["loss"] > cutoff:
+                    run_ids.append(
+                        log_finished_run(
+                            client,
+                            experiment_id,
+                            trial["params"],
+                            trial["metrics"],
+                            trial["tags"],
+                        )
+                    )
+                    continue
+                with mlflow.start_run(experiment_id=experiment_id) as run:
+                    log_batch(
+                        client,
+                        run.info.run_id,
+                        trial["params"],
+                        trial["metrics"],
+                        trial["tags"],
+                    )
+                    log_sklearn_model(
+                        joblib.load(trial["model_path"]), artifact_path
+                    )
+                run_ids.append(run.info.run_id)
+            return run_ids
+        finally:
+            shutil.rmtree(self.stage_dir, ignore_errors=True)
@@ -1,19 +1,23 @@
 # Import Libraries
 
 import os
-import yaml
+import copy
+import logging
+import threading
 import mlflow
 
 from hyperopt.pyll import scope
-from hyperopt import hp, STATUS_OK, fmin, Trials, tpe
+from hyperopt import hp, STATUS_OK, Trials
 
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction import DictVectorizer
 
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 
+import xgboost as xgb
+from scipy import sparse
+
 from dotenv import load_dotenv
 from sklearn.pipeline import make_pipeline
 
@@ -21,24 +25,42 @@ from flask import Flask, request, jsonify
 import warnings
 
 warnings.filterwarnings("ignore")
-from utils import evaluate_model, pull_data_from_db, connect_sqlite
+from utils import evaluate_model, pull_data_from_db
+from search import (
+    halving_schedule,
+    install_shared,
+    parallel_fmin,
+    search_parallelism,
+    shared_objective,
+    successive_halving,
+)
+from tracking import TrialLogger
+from sampling import required_columns, sample_training_rows
+from incremental import WATERMARK_TAG, table_watermark, update_production_model
+from features import FeatureCache, build_features, feature_cache_key
+from common.db import get_connection, release_connections
+from common.config import load_yaml_config
+from common.columnar import load_processed_data
+from common.schema import load_schema
+from common.migrations import migrate
+from common.jobs import JobManager
 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 def load_config():
 
     config_path = os.getenv("config_path")
-    with open(config_path) as config:
-        config = yaml.safe_load(config)
-    return config
+    return load_yaml_config(config_path)
 
 
 def get_engine():
     config = load_config()
     customer_data_path = config["database"]["db_path"]
-    dbengine = connect_sqlite(customer_data_path)
+    dbengine = get_connection(customer_data_path)
     return dbengine
 
 
@@ -51,96 +73,211 @@ def initialize_mlflow():
 
 
 # Load and Process Data
-def process_data(tablename):
+def load_training_frame(tablename):
+    """Load the processed rows to train on, without the date column.
 
+    With ``sampling.enabled`` the rows are a sample drawn in SQL (see
+    :func:`sampling.sample_training_rows`); otherwise the latest 10000.
+    """
     config = load_config()
     dbengine = get_engine()
 
-    data = pull_data_from_db(dbengine, tablename)
+    dtypes = load_schema(dbengine, tablename)
+    columnar = config.get("columnar") or {}
+    sampling = config.get("sampling") or {}
+    if sampling.get("enabled"):
+        data = sample_training_rows(
+            dbengine, tablename, sampling, columns=sampling.get("columns"), dtypes=dtypes
+        )
+    elif columnar.get("path"):
+        data = load_processed_data(
+            dbengine,
+            tablename,
+            columns=required_columns(columnar.get("columns"), "date"),
+            start_date=columnar.get("start_date"),
+            end_date=columnar.get("end_date"),
+            columnar_path=columnar["path"],
+            dtypes=dtypes,
+        )
+        data = data.sort_values("date", ascending=False).head(10000)
+    else:
+        data = pull_data_from_db(dbengine, tablename, dtypes=dtypes)
     dframe = data.copy()
     dframe.drop(["date"], axis=1, inplace=True)
-    customerid = dframe.pop("customerid")
+    return dframe
 
-    y = dframe["churn"]
 
-    X = dframe.drop(["churn"], axis=1)
-    X = X.to_dict(orient="records")
+feature_cache = None
+_feature_cache_lock = threading.Lock()
 
-    output_dframe = train_test_split(
-        X, y, test_size=config["parameters"]["test_size"], random_state=11
-    )
-    return customerid, output_dframe
+
+def get_feature_cache():
+    """The process-wide feature cache, created on first use."""
+    global feature_cache
+    with _feature_cache_lock:
+        if feature_cache is None:
+            cache_dir = (load_config().get("features") or {}).get("cache_dir")
+            feature_cache = FeatureCache(cache_dir)
+    return feature_cache
 
 
-def linear_model(data):
+def load_features(tablename):
+    """Encoded train/test matrices for ``tablename``, built once per data version.
 
+    The key combines a hash of the loaded rows with the split settings, so
+    every trial of a search and every later ``/train`` call on the same data
+    reuse one encoding instead of re-vectorizing the records.
+    """
     config = load_config()
-    developer = config["base"]["developer"]
-    artifact_path = f"{config['base']['artifact_path']}"
+    # Read before the rows, so rows added meanwhile are after the watermark
+    watermark = table_watermark(get_engine(), tablename)
+    dframe = load_training_frame(tablename).drop(columns=["customerid"])
+    settings = {"test_size": config["parameters"]["test_size"], "random_state": 11}
+    key = feature_cache_key(dframe, settings)
+    features = get_feature_cache().get_or_build(
+        key, lambda: build_features(dframe, key=key, **settings)
+    )
+    features.watermark = watermark
+    return features
+
 
-    (train_x, test_x, train_y, test_y) = data
+def run_tags(features):
+    """Tags every training run of ``features`` carries."""
+    if getattr(features, "watermark", None) is None:
+        return {}
+    return {WATERMARK_TAG: features.watermark}
+
+
+def linear_c_values(config):
     lr_params = config["hyperparameters"]["linear_model"]
-    c_values = range(lr_params["min_c"], lr_params["max_c"], lr_params["interval"])
+    return range(lr_params["min_c"], lr_params["max_c"], lr_params["interval"])
+
 
-    for val in c_values:
+def linear_model(features, on_trial=None):
+    """Fit a logistic regression for every C value; return the best test F1."""
+    config = load_config()
+    developer = config["base"]["developer"]
 
-        with mlflow.start_run():
-            mlflow.set_tag("developer", developer)
-            mlflow.set_tag("model_name", "linearRegression")
-            mlflow.log_param("c", val)
+    (train_x, test_x, train_y, test_y) = features
+    c_values = linear_c_values(config)
 
-            lr_pipeline = make_pipeline(
-                DictVectorizer(sparse=False), LogisticRegression(C=val)
-            )
-            lr_pipeline.fit(train_x, train_y)
+    if config["hyperparameters"]["linear_model"].get("sweep", False):
+        return linear_model_sweep(features, c_values, config, on_trial=on_trial)
 
-            test_pred = lr_pipeline.predict(test_x)
+    # Runs are written once the loop ends; only the best C values log a model
+    trial_logger = TrialLogger(config, tags=run_tags(features))
+    tags = {"developer": developer, "model_name": "linearRegression"}
+    results = []
+    try:
+        for val in c_values:
+            model = LogisticRegression(C=val)
+            model.fit(train_x, train_y)
+
+            test_pred = model.predict(test_x)
             test_output_eval = evaluate_model(test_y, test_pred)
-            mlflow.log_metrics(test_output_eval)
-            mlflow.sklearn.log_model(lr_pipeline, artifact_path=artifact_path)
+            lr_pipeline = make_pipeline(features.encoder, model)
+            trial = trial_logger.record({"c": val}, test_output_eval, tags, lr_pipeline)
+            results.append({"loss": -test_output_eval["f1_score"], "trial": trial})
+
+            if on_trial is not None:
+                on_trial()
+    finally:
+        trial_logger.flush(results)
+
+    return max(-result["loss"] for result in results)
+
+
+def linear_model_sweep(features, c_values, config, on_trial=None):
+    """Fit the regularization path over ``c_values`` as one warm-started sweep.
+
+    Each fit starts the solver from the previous solution, so the whole path
+    costs about as much as one cold fit. Every point still gets its own
+    MLflow run, written with a single batch request; only the best point(s)
+    log a model artifact (see :class:`TrialLogger`).
+    """
+    (train_x, test_x, train_y, test_y) = features
+
+    trial_logger = TrialLogger(config, tags=run_tags(features))
+    tags = {"developer": config["base"]["developer"], "model_name": "linearRegression"}
+    model = LogisticRegression(warm_start=True)
+    results = []
+    try:
+        for val in sorted(c_values):
+            model.set_params(C=val)
+            model.fit(train_x, train_y)
+            evaluation = evaluate_model(test_y, model.predict(test_x))
+            pipeline = make_pipeline(features.encoder, copy.deepcopy(model))
+            trial = trial_logger.record({"c": val}, evaluation, tags, pipeline)
+            results.append({"loss": -evaluation["f1_score"], "trial": trial})
+            if on_trial is not None:
+                on_trial()
+    finally:
+        trial_logger.flush(results)
+
+    return max(-result["loss"] for result in results)
 
 
 class Tree:
-    def __init__(self, data):
+    def __init__(self, features):
         self.fullconfig = load_config()
         self.config = self.fullconfig["hyperparameters"]["tree_models"]
         self.developer = self.fullconfig["base"]["developer"]
         self.artifact_path = f"{self.fullconfig['base']['artifact_path']}"
-        self.train_x, self.test_x, self.train_y, self.test_y = data
+        self.encoder = features.encoder
+        self.tags = run_tags(features)
+        self.train_x, self.test_x, self.train_y, self.test_y = features
+
+    def build_model(self, model_name, params):
+        if model_name == "decisiontree":
+            return DecisionTreeClassifier(**params)
+        elif model_name == "randomforest":
+            return RandomForestClassifier(**params)
+        print(f"{model_name} does not exist in models")
 
     def objective(self, params):
 
         model_name = params["model_name"]
         del params["model_name"]
-        with mlflow.start_run():
-            mlflow.set_tag("developer", self.developer)
-            mlflow.set_tag("model_name", model_name)
-            mlflow.log_params(params)
-
-            if model_name == "decisiontree":
-                pipeline = make_pipeline(
-                    DictVectorizer(sparse=False), DecisionTreeClassifier(**params)
-                )
-
-            elif model_name == "randomforest":
-                pipeline = make_pipeline(
-                    DictVectorizer(sparse=False), RandomForestClassifier(**params)
-                )
-
-            else:
-                print(f"{model_name} does not exist in models")
-
-            pipeline.fit(self.train_x, self.train_y)
-            prediction = pipeline.predict(self.test_x)
-            prediction_eval = evaluate_model(self.test_y, prediction)
-
-            mlflow.log_metrics(prediction_eval)
-            mlflow.sklearn.log_model(pipeline, artifact_path=self.artifact_path)
-
+        budget = params.pop("budget", 1.0)
+        if budget < 1.0:
+            return self.partial_objective(model_name, params, budget)
+
+        model = self.build_model(model_name, params)
+
+        # The features are encoded once; the logged pipeline re-attaches
+        # the fitted encoder so the model takes DataFrames of raw columns
+        model.fit(self.train_x, self.train_y)
+        prediction = model.predict(self.test_x)
+        prediction_eval = evaluate_model(self.test_y, prediction)
+
+        # The run is written by TrialLogger.flush once the search ends
+        pipeline = make_pipeline(self.encoder, model)
+        tags = {"developer": self.developer, "model_name": model_name}
+        trial = self.trial_logger.record(params, prediction_eval, tags, pipeline)
+
+        return {"loss": -prediction_eval["f1_score"], "status": STATUS_OK, "trial": trial}
+
+    def partial_objective(self, model_name, params, budget):
+        """Score ``params`` with a ``budget`` fraction of the full training cost.
+
+        A random forest is grown with that fraction of its trees on all rows;
+        a decision tree is fit on that fraction of the (shuffled) rows.
+        Low-budget scores only rank candidates for successive halving, so no
+        MLflow run is logged; deployment ranks runs by F1 and must only see
+        models trained at full budget.
+        """
+        rows = len(self.train_y)
+        model = self.build_model(model_name, params)
+        if model_name == "randomforest":
+            model.set_params(n_estimators=max(int(model.n_estimators * budget), 1))
+        else:
+            rows = max(int(rows * budget), 1)
+        model.fit(self.train_x[:rows], self.train_y[:rows])
+        prediction_eval = evaluate_model(self.test_y, model.predict(self.test_x))
         return {"loss": -prediction_eval["f1_score"], "status": STATUS_OK}
 
     # @log_step("Train Trea Model")
-    def train(self, model_name):
+    def train(self, model_name, on_trial=None):
 
         criterion = self.config["criterion"]
         min_depth, max_depth = self.config["min_depth"], self.config["max_depth"]
@@ -165,67 +302,134 @@ class Tree:
             "model_name": model_name,
         }
 
-        best_result = fmin(
-            fn=self.objective,
-            space=space,
-            algo=tpe.suggest,
-            max_evals=50,
-            trials=Trials(),
-        )
+        search = self.fullconfig.get("search", {})
+        self.trial_logger = TrialLogger(self.fullconfig, tags=self.tags)
+        # Workers receive this Tree and its matrices once, from the pool
+        # initializer; each trial then only sends its params
+        parallelism = search_parallelism(search)
+        objective = shared_objective if parallelism > 1 else self.objective
+        # Trials return their params, metrics and staged model; MLflow runs
+        # are written here once the search ends, also if it is cancelled
+        if search.get("strategy", "tpe") == "halving":
+            halving = search.get("halving", {})
+            results = []
+            try:
+                best_result, _ = successive_halving(
+                    objective,
+                    space,
+                    n_candidates=search.get("max_evals", 50),
+                    min_budget=halving.get("min_budget", 1 / 9),
+                    eta=halving.get("eta", 3),
+                    parallelism=parallelism,
+                    seed=11,
+                    initializer=install_shared,
+                    initargs=(self,),
+                    on_trial=on_trial,
+                    results=results,
+                )
+            finally:
+                self.trial_logger.flush(results)
+            return best_result
+
+        trials = Trials()
+        try:
+            best_result = parallel_fmin(
+                objective,
+                space,
+                max_evals=search.get("max_evals", 50),
+                parallelism=parallelism,
+                trials=trials,
+                initializer=install_shared,
+                initargs=(self,),
+                on_trial=on_trial,
+            )
+        finally:
+            self.trial_logger.flush(trials.results)
 
         return best_result
 
 
 class XGBoost:
-    def __init__(self, data, num_boost_round=1000, early_stopping_rounds=50):
+    def __init__(self, features, num_boost_round=1000, early_stopping_rounds=50):
 
         self.num_boost_round = num_boost_round
         self.early_stopping_rounds = early_stopping_rounds
         self.booster = None
-        self.vectorizer = DictVectorizer(sparse=False)
+        self.encoder = features.encoder
+        self.tags = run_tags(features)
 
         self.fullconfig = load_config()
         self.config = self.fullconfig["hyperparameters"]["xgboost"]
         self.developer = self.fullconfig["base"]["developer"]
         self.artifact_path = f"{self.fullconfig['base']['artifact_path']}"
-        self.train_x, self.test_x, self.train_y, self.test_y = data
-
-    def fit(self, x, y):
+        self.train_x, self.test_x, self.train_y, self.test_y = features
+        self.max_bin = self.config.get("max_bin", 256)
+        self.dtrain = self.dvalid = self.dtest = None
+
+    def build_matrices(self):
+        """Quantize the training data once for every trial of the search.
+
+        The one-hot features are mostly zeros, so they are passed as CSR.
+        Early stopping watches a stratified validation split carved out of
+        the training rows; the test rows stay untouched for the reported
+        metrics.
+        """
+        train_x = sparse.csr_matrix(self.train_x)
+        fit_x, valid_x, fit_y, valid_y = train_test_split(
+            train_x,
+            self.train_y,
+            test_size=self.config.get("validation_size", 0.2),
+            stratify=self.train_y,
+            random_state=11,
+        )
+        self.dtrain = xgb.QuantileDMatrix(fit_x, label=fit_y, max_bin=self.max_bin)
+        self.dvalid = xgb.QuantileDMatrix(
+            valid_x, label=valid_y, ref=self.dtrain, max_bin=self.max_bin
+        )
+        self.dtest = xgb.DMatrix(sparse.csr_matrix(self.test_x))
 
-        X_sparse = self.vectorizer.fit_transform(x)
+    def fit(self, params):
 
-        # Create xgb.DMatrix
-        dtrain = xgb.DMatrix(X_sparse, label=y)
+        if self.dtrain is None:
+            self.build_matrices()
         self.booster = xgb.train(
-            self.config,
-            dtrain=dtrain,
+            {
+                **params,
+                "tree_method": "hist",
+                "max_bin": self.max_bin,
+                "nthread": self.config.get("nthread"),
+            },
+            dtrain=self.dtrain,
             num_boost_round=self.num_boost_round,
             early_stopping_rounds=self.early_stopping_rounds,
-            evals=[(dtrain, "train")],
-            verbose_eval=50,
+            evals=[(self.dvalid, "validation")],
+            verbose_eval=False,
         )
-        mlflow.xgboost.log_model(self.booster, artifact_path=self.artifact_path)
+        return self.booster
 
     def objective(self, config):
 
         model_name = config["model_name"]
         del config["model_name"]
-        with mlflow.start_run():
 
-            mlflow.set_tag("developer", self.developer)
-            mlflow.set_tag("model_name", model_name)
-            mlflow.log_params(config)
+        self.fit(config)
+        prediction = self.predict(self.dtest)
+        prediction = (prediction >= 0.5).astype("int")
+        prediction_eval = evaluate_model(self.test_y, prediction)
 
-            self.fit(self.train_x, self.train_y)
-            prediction = self.predict(self.test_x)
-            prediction = (prediction >= 0.5).astype("int")
+        # Log the booster as a scikit-learn classifier behind the encoder, so
+        # deployment loads and serves it like the other model families
+        model = xgb.XGBClassifier()
+        model.load_model(bytearray(self.booster.save_raw("json")))
+        pipeline = make_pipeline(self.encoder, model)
+        params = {**config, "best_iteration": self.booster.best_iteration}
+        tags = {"developer": self.developer, "model_name": model_name}
+        trial = self.trial_logger.record(params, prediction_eval, tags, pipeline)
 
-            prediction_eval = evaluate_model(self.test_y, prediction)
-            mlflow.log_metrics(prediction_eval)
-        return {"loss": -prediction_eval["f1_score"], "status": STATUS_OK}
+        return {"loss": -prediction_eval["f1_score"], "status": STATUS_OK, "trial": trial}
 
     # @log_step("Train Xgboost")
-    def inference(self, model_name):
+    def inference(self, model_name, on_trial=None):
 
         objective = self.config["objective"]
         metric = self.config["eval_metric"]
@@ -251,50 +455,171 @@ class XGBoost:
             "model_name": model_name,
         }
 
-        best_result = fmin(
-            fn=self.objective,
-            space=search_space,
-            algo=tpe.suggest,
-            max_evals=50,
-            trials=Trials(),
-        )
+        # Trials run one after another in this process, reusing the quantized
+        # matrices; each fit uses every core through XGBoost's own threads
+        search = self.fullconfig.get("search", {})
+        self.trial_logger = TrialLogger(self.fullconfig, tags=self.tags)
+        trials = Trials()
+        try:
+            best_result = parallel_fmin(
+                self.objective,
+                search_space,
+                max_evals=search.get("max_evals", 50),
+                parallelism=1,
+                trials=trials,
+                on_trial=on_trial,
+            )
+        finally:
+            self.trial_logger.flush(trials.results)
         return best_result
 
     def predict(self, X):
-        X_sparse = self.vectorizer.transform(X)
+        # Accepts a prepared DMatrix or the pre-encoded features
+        dmatrix = X if isinstance(X, xgb.DMatrix) else xgb.DMatrix(X)
 
-        # Create xgb.DMatrix
-        dmatrix = xgb.DMatrix(X_sparse)
-
-        # Use the trained model for predictions
-        predictions = self.booster.predict(dmatrix)
+        # Use the boosting rounds up to the early-stopping optimum
+        predictions = self.booster.predict(
+            dmatrix, iteration_range=(0, self.booster.best_iteration + 1)
+        )
         return predictions
 
 
 app = Flask("Model_Training")
+# Return pooled database connections at the end of every request
+app.teardown_appcontext(release_connections)
+
+# Training jobs, created on first use from the ``jobs`` config section
+jobs = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_manager():
+    """The process-wide job manager, created on first use.
+
+    Creation is locked: concurrent first requests must share one manager, or
+    jobs submitted to a discarded one could not be looked up or cancelled.
+    """
+    global jobs
+    with _jobs_lock:
+        if jobs is None:
+            workers = load_config().get("jobs", {}).get("workers", 1)
+            jobs = JobManager(max_workers=workers)
+    return jobs
+
+
+def planned_trials(config, model_families):
+    """Number of trials a training run makes, for progress reporting."""
+    search = config.get("search", {})
+    max_evals = search.get("max_evals", 50)
+    total = 0
+    for family in model_families:
+        if family == "linearmodel":
+            total += len(linear_c_values(config))
+        elif family in ("decisiontree", "randomforest") and (
+            search.get("strategy", "tpe") == "halving"
+        ):
+            halving = search.get("halving", {})
+            schedule = halving_schedule(
+                max_evals, halving.get("min_budget", 1 / 9), halving.get("eta", 3)
+            )
+            total += sum(size for _, size in schedule)
+        else:
+            total += max_evals
+    return total
 
 
-@app.route("/train", methods=["GET"])
+def run_training(job):
+    """Train every model family in ``base.model``, one progress step per trial."""
+    config = load_config()
+    model_families = config["base"].get("model", ["linearmodel"])
+    job.update(
+        stage="features", completed=0, total=planned_trials(config, model_families)
+    )
+    initialize_mlflow()
+
+    features = load_features("processdata")
+    for family in model_families:
+        job.check_cancelled()
+        job.update(stage=family)
+        logger.info(f"Train {family}")
+        if family == "linearmodel":
+            linear_model(features, on_trial=job.advance)
+        elif family in ("decisiontree", "randomforest"):
+            Tree(features).train(family, on_trial=job.advance)
+        elif family == "xgboost":
+            XGBoost(features).inference(family, on_trial=job.advance)
+        else:
+            logger.warning(f"Unknown model family {family}, skipping")
+
+    job.update(stage="done")
+    return {"response": "Model Training Complete"}
+
+
+@app.route("/train", methods=["GET", "POST"])
 def main():
+    """Queue a training run and return its job id without waiting for it.
+
+    Only one training run is queued or running at a time; while one is,
+    further requests get its job id back instead of starting another sweep.
+    """
+    job, created = get_job_manager().submit_unique(
+        "train", run_training, key="train"
+    )
+    message = "Training queued" if created else "Training already in progress"
+    return (
+        jsonify({"status": "accepted", "message": message, "job_id": job.id}),
+        202,
+    )
+
 
+def run_update(job):
+    """Update the Production model with the rows added since it was trained."""
+    config = load_config()
     initialize_mlflow()
+    job.update(stage="update")
+    dbengine = get_engine()
+    result = update_production_model(
+        config, dbengine, "processdata", dtypes=load_schema(dbengine, "processdata")
+    )
+    job.update(stage="done")
+    return result
+
+
+@app.route("/update", methods=["POST"])
+def update():
+    """Queue an incremental update of the Production model.
+
+    Shares the training queue key, so it never runs alongside a full sweep.
+    Poll ``/train/jobs/<job_id>``; a result with ``updated: false`` carries
+    the reason a full ``/train`` is needed instead.
+    """
+    job, created = get_job_manager().submit_unique("update", run_update, key="train")
+    message = "Update queued" if created else f"A {job.kind} job is already in progress"
+    return (
+        jsonify({"status": "accepted", "message": message, "job_id": job.id}),
+        202,
+    )
 
-    _, data = process_data("processdata")
-    linear_model(data)
 
-    # tree = Tree(data)
-    # tree.train("randomforest")
-    # logging.info("Train Random Forest")
-    # tree = Tree(data)
-    # tree.train("decisiontree")
-    # logging.info("Train Decision Tree")
-    # xgboost = XGBoost( data)
-    # xgboost_result = xgboost.train("xgboost")
+@app.route("/train/jobs/<job_id>", methods=["GET"])
+def training_status(job_id):
+    """Report the status, per-trial progress and ETA of a training job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown job {job_id}"}), 404
+    return jsonify(job.to_dict())
 
-    # logging.info("Train Xgboost")
 
-    return jsonify({"response": "Model Training Complete"})
+@app.route("/train/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_training(job_id):
+    """Cancel a training job; it stops after the trial in progress"""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown job {job_id}"}), 404
+    return jsonify(job.to_dict()), 202
 
 
 if __name__ == "__main__":
+    migrate(get_engine())
+    release_connections()
     app.run(debug=True, host="0.0.0.0", port=8001)
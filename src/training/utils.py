@@ -1,8 +1,8 @@
 import os
-import yaml
 import logging
-import sqlite3
 import pandas as pd
+from common.db import connect_sqlite, read_sql
+from common.config import load_yaml_config
 from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
 
 # Global config variable
@@ -13,8 +13,7 @@ def load_config(config_path):
     """Load configuration from YAML file."""
     global config
     try:
-        with open(config_path) as conf_file:
-            config = yaml.safe_load(conf_file)
+        config = load_yaml_config(config_path)
         return config
     except Exception as e:
         logging.error(f"Error loading config: {str(e)}")
@@ -39,16 +38,6 @@ def get_customer_data_path():
     return None
 
 
-def connect_sqlite(dbpath: str) -> sqlite3.Connection:
-    """Create and return a SQLite connection."""
-    try:
-        return sqlite3.connect(dbpath, check_same_thread=False)
-    except Exception as e:
-        print(dbpath)
-        print(f"Error connecting to SQLite: {str(e)}")
-        raise
-
-
 def validate_config(config_dict):
     """Validate the configuration file for required fields and proper values."""
     required_sections = ["base", "database", "data", "hyperparameters"]
@@ -95,11 +84,11 @@ def evaluate_model(y_true, y_pred):
     return out
 
 
-def pull_data_from_db(db_engine, tablename: str):
+def pull_data_from_db(db_engine, tablename: str, dtypes: dict = None):
     """Retrieve all data from a database table."""
     try:
         query = f"SELECT * FROM {tablename} ORDER BY date DESC LIMIT 10000"
-        return pd.read_sql(query, db_engine)
+        return read_sql(db_engine, query, dtypes=dtypes)
     except Exception as e:
         print(f"Error pulling data from database: {str(e)}")
         return None